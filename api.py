@@ -4,17 +4,30 @@ Resume Processing API Service - Simplified Version
 Place this file in: /Users/laavanya/Desktop/college/snlp/resume-intelligence-ai/
 """
 
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import asyncio
+import functools
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import tempfile
+import hashlib
+import uuid
+from cachetools import TTLCache
+
+try:
+    import redis.asyncio as redis_async
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
 import json
 from datetime import datetime
+import time
 import os
+from dataclasses import dataclass, field
 
 # Import your existing modules from the correct paths
 import sys
@@ -32,12 +45,12 @@ sys.path.insert(0, str(current_dir))  # For config.py in root
 
 try:
     # From backend/resume_parser/
-    from text_extractor import DocumentTextExtractor
+    from text_extractor import DocumentTextExtractor, EXTRACTOR_VERSION
     from gemini_resume_parser import enhanced_gemini_extraction as extract_resume_with_gemini  
     
     # From backend/neo4j_service/
-    from resume_storage import store_resume_in_neo4j
-    from connection import init_neo4j
+    from resume_storage import store_resume_batch_in_neo4j_async
+    from connection import init_neo4j, init_neo4j_async, neo4j_connection
     
     print("✅ Successfully imported all modules")
     print(f"📁 Resume parser path: {resume_parser_dir}")
@@ -81,7 +94,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Resume Intelligence API",
     description="Process resumes and extract insights using AI",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Response models
@@ -106,16 +120,293 @@ class JobStatus(BaseModel):
     job_id: str
     status: str  # "processing", "completed", "failed"
     progress: int  # 0-100
+    user_email: Optional[str] = None
     result: Optional[ProcessingResult] = None
 
-# In-memory job tracking
-job_tracker: Dict[str, JobStatus] = {}
+# Dedicated pool for blocking work (text extraction, Gemini, Neo4j) so it
+# never runs on the event loop thread
+blocking_executor = ThreadPoolExecutor(
+    max_workers=(os.cpu_count() or 1) * 2,
+    thread_name_prefix="resume-worker"
+)
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call in the dedicated pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_executor, functools.partial(func, *args, **kwargs))
+
+# Extracted text is cached on disk by file content hash
+TEXT_CACHE_DIR = Path(os.getenv("TEXT_CACHE_DIR", "cache/text"))
+
+# Uploads are streamed to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MB
+
+def write_all(fd: int, data: bytes):
+    """Write all of `data` to a raw file descriptor"""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+class JobTracker:
+    """In-process job status store, bounded by size/TTL and lock-protected"""
+    
+    def __init__(self, maxsize: int = 10_000, ttl: int = 3600):
+        self._jobs: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = asyncio.Lock()
+    
+    async def create(self, job: JobStatus):
+        async with self._lock:
+            self._jobs[job.job_id] = job
+    
+    async def get(self, job_id: str) -> Optional[JobStatus]:
+        async with self._lock:
+            return self._jobs.get(job_id)
+    
+    async def update(self, job_id: str, **fields):
+        async with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                for name, value in fields.items():
+                    setattr(job, name, value)
+    
+    async def count(self, status: str) -> int:
+        async with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status == status)
+
+class RedisJobTracker(JobTracker):
+    """Redis-backed job status store, shared by all uvicorn workers"""
+    
+    KEY_PREFIX = "job:"
+    
+    # Sorted set of job IDs per status, scored by when the job key expires
+    STATUS_KEY_PREFIX = "job-status:"
+    
+    def __init__(self, url: str, ttl: int = 3600):
+        self._redis = redis_async.from_url(url)
+        self._ttl = ttl
+    
+    async def create(self, job: JobStatus):
+        await self._store(job)
+    
+    async def get(self, job_id: str) -> Optional[JobStatus]:
+        raw = await self._redis.get(self.KEY_PREFIX + job_id)
+        return JobStatus.model_validate_json(raw) if raw else None
+    
+    async def update(self, job_id: str, **fields):
+        # Each job is only ever updated by the worker processing it
+        job = await self.get(job_id)
+        if job is not None:
+            await self._store(job.model_copy(update=fields), previous_status=job.status)
+    
+    async def _store(self, job: JobStatus, previous_status: Optional[str] = None):
+        """Write the job and move it into its status set, in one round-trip"""
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.set(self.KEY_PREFIX + job.job_id, job.model_dump_json(), ex=self._ttl)
+            if previous_status is not None and previous_status != job.status:
+                pipe.zrem(self.STATUS_KEY_PREFIX + previous_status, job.job_id)
+            pipe.zadd(self.STATUS_KEY_PREFIX + job.status, {job.job_id: time.time() + self._ttl})
+            await pipe.execute()
+    
+    async def count(self, status: str) -> int:
+        # Drop jobs whose key has expired, then count what is left
+        key = self.STATUS_KEY_PREFIX + status
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(key, "-inf", time.time())
+            pipe.zcard(key)
+            _, total = await pipe.execute()
+        return total
+
+# Job tracking - Redis when REDIS_URL is set (needed for multiple workers)
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL and REDIS_AVAILABLE:
+    job_tracker: JobTracker = RedisJobTracker(REDIS_URL)
+else:
+    job_tracker = JobTracker()
+
+# Content-hash caches so duplicate uploads skip the pipeline.
+# result_cache is keyed on (sha256, user_email) and short-circuits everything;
+# insights_cache is keyed on sha256 alone so another user uploading the same
+# file skips extraction and Gemini but still gets stored in Neo4j.
+result_cache: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+insights_cache: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+
+class BulkNeo4jWriter:
+    """Coalesce Neo4j writes from concurrent jobs into batched transactions.
+    
+    Jobs submit (user_email, insights) and await the user ID. A background
+    flush loop collects up to MAX_BATCH submissions, or whatever arrived within
+    FLUSH_MS of the first one, and stores them with a single UNWIND-driven
+    transaction on the async Bolt driver.
+    """
+    
+    MAX_BATCH = 64
+    FLUSH_MS = 200
+    
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    async def submit(self, user_email: str, insights: Dict) -> str:
+        """Queue a resume for storage and wait for its user ID"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((user_email, insights, future))
+        return await future
+    
+    def _ensure_started(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._queue = asyncio.Queue()
+            self._flush_task = asyncio.create_task(self._flush_loop())
+    
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.FLUSH_MS / 1000
+            
+            while len(batch) < self.MAX_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            await self._flush(batch)
+    
+    async def _flush(self, batch: List[Tuple[str, Dict, asyncio.Future]]):
+        resumes = [(user_email, insights) for user_email, insights, _ in batch]
+        logger.info(f"💾 Flushing {len(resumes)} resume(s) to Neo4j")
+        
+        try:
+            user_ids = await store_resume_batch_in_neo4j_async(resumes)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, _, future), user_id in zip(batch, user_ids):
+            if not future.done():
+                future.set_result(user_id)
+
+class TokenBucket:
+    """Async token bucket: allows `rate` acquisitions per second, bursting to `capacity`"""
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = None
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class GeminiBatcher:
+    """Coalesce bursts of Gemini requests and pace them under the API rate limit.
+    
+    Submissions arriving within WAIT_MS of each other (up to BATCH of them) are
+    dispatched together, each taking a token from the rate-limit bucket so a
+    burst of uploads queues up instead of triggering 429s.
+    """
+    
+    BATCH = 8
+    WAIT_MS = 500
+    
+    def __init__(self, requests_per_minute: int = int(os.getenv("GEMINI_RPM", "60"))):
+        self.bucket = TokenBucket(rate=requests_per_minute / 60, capacity=self.BATCH)
+        self._queue: Optional[asyncio.Queue] = None
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    async def submit(self, text: str, gemini_api_key: str) -> Dict:
+        """Queue a resume for Gemini analysis and wait for the insights"""
+        if self._flush_task is None or self._flush_task.done():
+            self._queue = asyncio.Queue()
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, gemini_api_key, future))
+        return await future
+    
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.WAIT_MS / 1000
+            
+            while len(batch) < self.BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            await asyncio.gather(*(self._call(*item) for item in batch))
+    
+    async def _call(self, text: str, gemini_api_key: str, future: asyncio.Future):
+        await self.bucket.acquire()
+        try:
+            insights = await run_blocking(extract_resume_with_gemini, text, gemini_api_key)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        
+        if not future.done():
+            future.set_result(insights)
+
+@dataclass
+class ResumeJob:
+    """A resume moving through the processing pipeline"""
+    job_id: str
+    user_email: str
+    file_path: str
+    gemini_api_key: str
+    content_hash: Optional[str] = None
+    start_time: float = field(default_factory=time.monotonic)  # for durations only
+    text: Optional[str] = None
+    insights: Optional[Dict] = None
+
+# Workers per pipeline stage. Gemini and Neo4j stages run enough workers to
+# fill a GeminiBatcher / BulkNeo4jWriter batch; those classes enforce the
+# actual rate limit and transaction concurrency.
+N_EXTRACT_WORKERS = 8
+N_GEMINI_WORKERS = GeminiBatcher.BATCH
+N_STORE_WORKERS = BulkNeo4jWriter.MAX_BATCH
 
 class ResumeProcessor:
-    """Handle the complete resume processing pipeline"""
+    """Handle the complete resume processing pipeline.
+    
+    Jobs flow through three queues (extract -> gemini -> store), each drained
+    by its own fixed pool of workers, so every stage runs at its own
+    concurrency instead of each upload running all three steps back to back.
+    """
     
     def __init__(self):
         self.text_extractor = DocumentTextExtractor()
+        self.bulk_writer = BulkNeo4jWriter()
+        self.gemini_batcher = GeminiBatcher()
+        self.extract_queue: Optional[asyncio.Queue] = None
+        self.gemini_queue: Optional[asyncio.Queue] = None
+        self.store_queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
         # Initialize Neo4j connection
         try:
             init_neo4j()
@@ -123,97 +414,214 @@ class ResumeProcessor:
         except Exception as e:
             logger.error(f"❌ Neo4j connection failed: {e}")
     
-    async def process_resume(self, job_id: str, user_email: str, file_path: str, gemini_api_key: str):
-        """Complete resume processing pipeline"""
+    def _text_cache_path(self, content_hash: str) -> Path:
+        # Versioned so bumping EXTRACTOR_VERSION invalidates old entries
+        return TEXT_CACHE_DIR / f"{content_hash}.v{EXTRACTOR_VERSION}.txt"
+    
+    async def _load_cached_text(self, content_hash: Optional[str]) -> Optional[str]:
+        """Return previously extracted text for this file content, if any"""
+        if not content_hash:
+            return None
+        
+        cache_path = self._text_cache_path(content_hash)
+        try:
+            return await run_blocking(cache_path.read_text, encoding='utf-8')
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read text cache {cache_path}: {e}")
+            return None
+    
+    async def _store_cached_text(self, content_hash: Optional[str], text: str):
+        """Persist extracted text keyed by file content hash"""
+        if not content_hash:
+            return
         
-        start_time = datetime.now()
+        cache_path = self._text_cache_path(content_hash)
+        try:
+            await run_blocking(TEXT_CACHE_DIR.mkdir, parents=True, exist_ok=True)
+            await run_blocking(cache_path.write_text, text, encoding='utf-8')
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write text cache {cache_path}: {e}")
+    
+    async def _extract_text(self, job_id: str, file_path: str):
+        """Extract text page by page off the event loop, reporting progress per page"""
+        file_name = Path(file_path).name
+        pages = []
         
         try:
-            # Update job status
-            job_tracker[job_id].status = "processing"
-            job_tracker[job_id].progress = 10
-            
-            # Step 1: Extract text from document
-            logger.info(f"🔄 [{job_id}] Extracting text from {file_path}")
-            text, error = self.text_extractor.extract_text(file_path)
-            
-            if error:
-                raise Exception(f"Text extraction failed: {error}")
-            
-            job_tracker[job_id].progress = 30
-            
-            # Step 2: Analyze with Gemini AI
-            logger.info(f"🧠 [{job_id}] Analyzing with Gemini AI...")
-            insights = extract_resume_with_gemini(text, gemini_api_key)
-            
-            if insights.get('extraction_method') == 'fallback':
-                logger.warning(f"⚠️ [{job_id}] Gemini extraction failed, using fallback")
-            
-            job_tracker[job_id].progress = 70
-            
-            # Step 3: Store in Neo4j
-            logger.info(f"💾 [{job_id}] Storing in Neo4j...")
-            user_id = store_resume_in_neo4j(user_email, insights)
-            
-            job_tracker[job_id].progress = 90
-            
-            # Calculate processing time
-            processing_time = (datetime.now() - start_time).total_seconds()
-            
-            # Create result
-            result = ProcessingResult(
-                success=True,
-                user_email=user_email,
-                extraction_method=insights.get('extraction_method', 'unknown'),
-                skills_extracted=len(insights.get('technical_skills', [])),
-                projects_found=len(insights.get('projects', [])),
-                experience_level=insights.get('experience_level', {}).get('level', 'unknown'),
-                processing_time=processing_time,
-                timestamp=datetime.now().isoformat()
-            )
-            
-            # Update job status
-            job_tracker[job_id].status = "completed"
-            job_tracker[job_id].progress = 100
-            job_tracker[job_id].result = result
+            page_iter = self.text_extractor.iter_pages(file_path)
+            while (page := await run_blocking(next, page_iter, None)) is not None:
+                pages.append(page)
+                await job_tracker.update(job_id, progress=min(10 + 2 * len(pages), 28))
+        except Exception as e:
+            return None, f"Failed to extract text from {file_name}: {e}"
+        
+        return self.text_extractor.text_from_pages(pages, file_name)
+    
+    async def submit(self, job: "ResumeJob"):
+        """Queue an uploaded resume for processing"""
+        await self.extract_queue.put(job)
+    
+    def start(self):
+        """Spawn the per-stage worker pools (call once the event loop is running)"""
+        self.extract_queue = asyncio.Queue()
+        self.gemini_queue = asyncio.Queue()
+        self.store_queue = asyncio.Queue()
+        
+        stages = [
+            (self._extract_stage, self.extract_queue, N_EXTRACT_WORKERS),
+            (self._gemini_stage, self.gemini_queue, N_GEMINI_WORKERS),
+            (self._store_stage, self.store_queue, N_STORE_WORKERS),
+        ]
+        for stage, queue, workers in stages:
+            for _ in range(workers):
+                self._workers.append(asyncio.create_task(self._run_stage(stage, queue)))
+    
+    async def stop(self):
+        """Cancel all stage workers"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+    
+    async def _run_stage(self, stage, queue: asyncio.Queue):
+        """Worker loop: run `stage` on each job and forward it to the queue it returns"""
+        while True:
+            job = await queue.get()
+            try:
+                next_queue = await stage(job)
+                if next_queue is not None:
+                    await next_queue.put(job)
+            except Exception as e:
+                await self._fail(job, e)
+            finally:
+                queue.task_done()
+    
+    async def _extract_stage(self, job: "ResumeJob") -> Optional[asyncio.Queue]:
+        """Step 1: extract text from the document (or reuse cached work)"""
+        try:
+            await job_tracker.update(job.job_id, status="processing", progress=10)
             
-            logger.info(f"✅ [{job_id}] Resume processing completed successfully")
+            job.insights = insights_cache.get(job.content_hash) if job.content_hash else None
+            if job.insights is not None:
+                logger.info(f"♻️ [{job.job_id}] Reusing cached insights for identical resume")
+                return self.store_queue
             
-        except Exception as e:
-            logger.error(f"❌ [{job_id}] Processing failed: {e}")
+            job.text = await self._load_cached_text(job.content_hash)
             
-            # Create error result
-            processing_time = (datetime.now() - start_time).total_seconds()
-            result = ProcessingResult(
-                success=False,
-                user_email=user_email,
-                extraction_method="failed",
-                skills_extracted=0,
-                projects_found=0,
-                experience_level="unknown",
-                processing_time=processing_time,
-                timestamp=datetime.now().isoformat(),
-                error=str(e)
-            )
+            if job.text is None:
+                logger.info(f"🔄 [{job.job_id}] Extracting text from {job.file_path}")
+                job.text, error = await self._extract_text(job.job_id, job.file_path)
+                
+                if error:
+                    raise Exception(f"Text extraction failed: {error}")
+                
+                await self._store_cached_text(job.content_hash, job.text)
+            else:
+                logger.info(f"♻️ [{job.job_id}] Using cached text extraction")
             
-            # Update job status
-            job_tracker[job_id].status = "failed"
-            job_tracker[job_id].progress = 0
-            job_tracker[job_id].result = result
+            await job_tracker.update(job.job_id, progress=30)
+            return self.gemini_queue
         
         finally:
-            # Clean up temporary file
-            try:
-                Path(file_path).unlink()
-            except:
-                pass
+            # The uploaded file isn't needed past this stage
+            self._cleanup(job)
+    
+    async def _gemini_stage(self, job: "ResumeJob") -> Optional[asyncio.Queue]:
+        """Step 2: analyze with Gemini AI"""
+        logger.info(f"🧠 [{job.job_id}] Analyzing with Gemini AI...")
+        job.insights = await self.gemini_batcher.submit(job.text, job.gemini_api_key)
+        job.text = None
+        
+        if job.insights.get('extraction_method') == 'fallback':
+            logger.warning(f"⚠️ [{job.job_id}] Gemini extraction failed, using fallback")
+        elif job.content_hash:
+            insights_cache[job.content_hash] = job.insights
+        
+        await job_tracker.update(job.job_id, progress=70)
+        return self.store_queue
+    
+    async def _store_stage(self, job: "ResumeJob") -> Optional[asyncio.Queue]:
+        """Step 3: store in Neo4j and record the result"""
+        insights = job.insights
+        
+        logger.info(f"💾 [{job.job_id}] Storing in Neo4j...")
+        await self.bulk_writer.submit(job.user_email, insights)
+        
+        await job_tracker.update(job.job_id, progress=90)
+        
+        # Calculate processing time
+        processing_time = time.monotonic() - job.start_time
+        
+        # Create result (fields are built here, so skip validation)
+        result = ProcessingResult.model_construct(
+            success=True,
+            user_email=job.user_email,
+            extraction_method=insights.get('extraction_method', 'unknown'),
+            skills_extracted=len(insights.get('technical_skills', [])),
+            projects_found=len(insights.get('projects', [])),
+            experience_level=insights.get('experience_level', {}).get('level', 'unknown'),
+            processing_time=processing_time,
+            timestamp=datetime.now().isoformat()
+        )
+        
+        # Update job status
+        await job_tracker.update(job.job_id, status="completed", progress=100, result=result)
+        
+        if job.content_hash and result.extraction_method != 'fallback':
+            result_cache[(job.content_hash, job.user_email)] = result
+        
+        logger.info(f"✅ [{job.job_id}] Resume processing completed successfully")
+        return None
+    
+    async def _fail(self, job: "ResumeJob", error: Exception):
+        """Mark a job as failed"""
+        logger.error(f"❌ [{job.job_id}] Processing failed: {error}")
+        self._cleanup(job)
+        
+        # Create error result
+        processing_time = time.monotonic() - job.start_time
+        result = ProcessingResult.model_construct(
+            success=False,
+            user_email=job.user_email,
+            extraction_method="failed",
+            skills_extracted=0,
+            projects_found=0,
+            experience_level="unknown",
+            processing_time=processing_time,
+            timestamp=datetime.now().isoformat(),
+            error=str(error)
+        )
+        
+        # Update job status
+        await job_tracker.update(job.job_id, status="failed", progress=0, result=result)
+    
+    def _cleanup(self, job: "ResumeJob"):
+        """Remove the temporary upload"""
+        try:
+            Path(job.file_path).unlink(missing_ok=True)
+        except OSError:
+            pass
 
 # Initialize processor
 processor = ResumeProcessor()
 
+@app.on_event("startup")
+async def startup():
+    """Open the pooled async Neo4j driver used by the write path"""
+    if await init_neo4j_async():
+        logger.info("✅ Async Neo4j driver ready")
+    processor.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop pipeline workers and release pooled Neo4j connections"""
+    await processor.stop()
+    await neo4j_connection.close_async()
+
 @app.post("/upload-resume", response_model=ProcessingResponse)
 async def upload_resume(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     user_email: str = "user@example.com",
     gemini_api_key: str = "your-api-key-here"
@@ -228,30 +636,57 @@ async def upload_resume(
         )
     
     # Generate job ID
-    job_id = f"job_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{hash(user_email) % 10000}"
+    job_id = f"job_{uuid.uuid4().hex[:12]}"
     
     try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{file.filename}") as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            temp_file_path = tmp_file.name
+        # Stream the upload to a private temp file, hashing each chunk in the
+        # same pass so duplicates can be detected
+        fd, temp_file_path = tempfile.mkstemp(suffix=f"_{file.filename}")
+        digest = hashlib.sha256()
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                await run_blocking(write_all, fd, chunk)
+        finally:
+            os.close(fd)
+        content_hash = digest.hexdigest()
+        
+        # Same file already processed for this user - return the cached result
+        cached_result = result_cache.get((content_hash, user_email))
+        if cached_result is not None:
+            Path(temp_file_path).unlink(missing_ok=True)
+            await job_tracker.create(JobStatus(
+                job_id=job_id,
+                status="completed",
+                progress=100,
+                user_email=user_email,
+                result=cached_result
+            ))
+            logger.info(f"♻️ [{job_id}] Duplicate upload, returning cached result")
+            
+            return ProcessingResponse(
+                success=True,
+                message="Resume already processed. Returning cached result.",
+                job_id=job_id,
+                estimated_time="0 seconds"
+            )
         
         # Initialize job tracking
-        job_tracker[job_id] = JobStatus(
+        await job_tracker.create(JobStatus(
             job_id=job_id,
             status="queued",
-            progress=0
-        )
+            progress=0,
+            user_email=user_email
+        ))
         
-        # Start background processing
-        background_tasks.add_task(
-            processor.process_resume,
+        # Hand off to the processing pipeline
+        await processor.submit(ResumeJob(
             job_id=job_id,
             user_email=user_email,
             file_path=temp_file_path,
-            gemini_api_key=gemini_api_key
-        )
+            gemini_api_key=gemini_api_key,
+            content_hash=content_hash
+        ))
         
         return ProcessingResponse(
             success=True,
@@ -268,10 +703,11 @@ async def upload_resume(
 async def get_job_status(job_id: str):
     """Get the status of a resume processing job"""
     
-    if job_id not in job_tracker:
+    job = await job_tracker.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return job_tracker[job_id]
+    return job
 
 @app.get("/health")
 async def health_check():
@@ -282,7 +718,7 @@ async def health_check():
         "version": "1.0.0",
         "working_directory": os.getcwd(),
         "neo4j_connected": True,
-        "active_jobs": len([j for j in job_tracker.values() if j.status == "processing"])
+        "active_jobs": await job_tracker.count("processing")
     }
 
 @app.get("/")
@@ -296,10 +732,23 @@ async def root():
     }
 
 if __name__ == "__main__":
+    import importlib.util
     import uvicorn
     
+    # DEV=1 gives a single auto-reloading worker. Otherwise run one worker per
+    # core - but only when job status is shared through Redis, since the
+    # in-memory tracker can't answer /job-status for jobs on other workers.
+    dev_mode = os.getenv("DEV") == "1"
+    default_workers = (os.cpu_count() or 2) if isinstance(job_tracker, RedisJobTracker) else 1
+    workers = 1 if dev_mode else int(os.getenv("WEB_CONCURRENCY", default_workers))
+    
+    # C-accelerated event loop and HTTP parser (pip install uvloop httptools)
+    loop_impl = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http_impl = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    
     print("🚀 Starting Resume Intelligence API...")
     print(f"📁 Working directory: {os.getcwd()}")
+    print(f"⚙️ Mode: {'development (reload)' if dev_mode else f'{workers} worker(s)'}, loop={loop_impl}, http={http_impl}")
     print("📋 Available at: http://localhost:8000")
     print("📚 API docs at: http://localhost:8000/docs")
     
@@ -308,6 +757,9 @@ if __name__ == "__main__":
         "api:app",  # This assumes the file is named api.py
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=dev_mode,
+        workers=workers,
+        loop=loop_impl,
+        http=http_impl,
         log_level="info"
     )
\ No newline at end of file
@@ -9,11 +9,15 @@ import os
 import json
 import tempfile
 from pathlib import Path
-from datetime import datetime
-import pandas as pd
-import plotly.express as px
+import numpy as np
 from dotenv import load_dotenv
 import hashlib
+import hmac
+from collections import Counter
+import io
+import secrets
+import shutil
+import time
 import uuid
 
 # Load environment variables
@@ -26,30 +30,162 @@ from gemini_resume_parser import extract_resume_with_gemini
 from data_adapter import adapt_gemini_output_for_neo4j
 from job_search_components import job_search_page, show_job_details, saved_jobs_page
 
+try:
+    # C JSON codec, much faster than the stdlib for analysis results
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    # SIMD base64 codec; same API as the stdlib module for what we use
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+try:
+    # SIMD-accelerated content hashing for cache keys
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
 try:
     from resume_storage import ResumeNeo4jStorage
     NEO4J_STORAGE_AVAILABLE = True
 except ImportError:
     NEO4J_STORAGE_AVAILABLE = False
 
+@st.cache_resource(show_spinner=False)
+def get_extractor():
+    """Shared text extractor, created once per process instead of per rerun"""
+    return DocumentTextExtractor()
+
+@st.cache_resource(show_spinner=False)
+def get_neo4j():
+    """Connect to Neo4j once per process and reuse the pooled driver across reruns"""
+    from connection import init_neo4j, neo4j_connection
+    if not init_neo4j():
+        # Raising keeps the failure out of the cache so the next rerun retries
+        raise ConnectionError("Could not connect to Neo4j")
+    return neo4j_connection
+
+# Password hashing: new accounts use scrypt, accounts created before
+# password_algo was stored keep verifying with PBKDF2
+PASSWORD_ALGO = "scrypt"
+LOGIN_CACHE_TTL = 300  # seconds a verified login skips the KDF
+LOGIN_CACHE_SIZE = 1024
+
+def new_salt():
+    """Random 16-byte salt, stored as hex"""
+    return secrets.token_bytes(16).hex()
+
+def salt_bytes(salt):
+    """Raw salt bytes: hex salts decode directly, older UUID-string salts are used as text"""
+    try:
+        return bytes.fromhex(salt)
+    except ValueError:
+        return salt.encode()
+
+def hash_password(password, salt, algo=PASSWORD_ALGO):
+    """Derive the hex password hash for the given algorithm"""
+    if algo == "scrypt":
+        # n=2**15, r=8 needs 32 MiB, just over hashlib's default maxmem
+        key = hashlib.scrypt(password.encode(), salt=salt_bytes(salt), n=2**15, r=8, p=1,
+                             maxmem=64 * 1024 * 1024, dklen=32)
+    else:
+        key = hashlib.pbkdf2_hmac('sha256', password.encode(), salt_bytes(salt), 100000)
+    return key.hex()
+
+@st.cache_resource(show_spinner=False)
+def get_login_cache():
+    """Process-wide record of recently verified logins: hmac(salt, password) -> (stored hash, verified at)"""
+    return {}
+
+def verify_password(password, salt, stored_hash, algo=None):
+    """Check a password against its stored hash, skipping the KDF for recent repeat logins"""
+    login_cache = get_login_cache()
+    cache_key = hmac.new(salt.encode(), password.encode(), hashlib.sha256).digest()
+    
+    cached = login_cache.get(cache_key)
+    if cached and cached[0] == stored_hash and time.monotonic() - cached[1] < LOGIN_CACHE_TTL:
+        return True
+    
+    if not hmac.compare_digest(hash_password(password, salt, algo or "pbkdf2"), stored_hash):
+        return False
+    
+    if len(login_cache) >= LOGIN_CACHE_SIZE:
+        login_cache.clear()
+    login_cache[cache_key] = (stored_hash, time.monotonic())
+    return True
+
+def content_fingerprint(data):
+    """Hex digest identifying file or text content, used to key caches"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if BLAKE3_AVAILABLE:
+        return blake3(data).hexdigest()
+    return hashlib.blake2b(data, digest_size=32).hexdigest()
+
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def extract_upload_text(fingerprint, suffix, _content, _name="document"):
+    """Extract text from uploaded bytes, cached by content fingerprint so re-uploads skip parsing"""
+    # Underscore arguments are left out of Streamlit's cache key, so the bytes are never re-hashed
+    return get_extractor().extract_text_from_stream(io.BytesIO(_content), suffix, _name)
+
+@st.cache_data(ttl=86400, max_entries=256, show_spinner=False)
+def analyze_resume_text(text_fingerprint, _text):
+    """Gemini analysis of resume text, memoized by text fingerprint to skip repeat API calls"""
+    from secrets_helper import GEMINI_API_KEY
+    analysis_result = extract_resume_with_gemini(_text, GEMINI_API_KEY)
+    
+    if not analysis_result:
+        # Raise rather than return so the failure isn't cached
+        raise RuntimeError("no result returned")
+    if analysis_result.get('extraction_method') == 'fallback':
+        # Gemini failed (no key, quota, bad JSON...) and returned an empty placeholder
+        raise RuntimeError(analysis_result.get('error', 'Gemini extraction failed'))
+    return analysis_result
+
+def _read_credentials(tx, email):
+    """Read transaction: stored hash, salt and algorithm for a user (None if unknown)"""
+    record = tx.run("""
+        MATCH (u:User {email: $email})
+        RETURN u.password_hash as hash, u.salt as salt, u.password_algo as algo
+    """, {'email': email}).single()
+    return record.data() if record else None
+
+def _create_user(tx, user):
+    """Write transaction: create the user unless the email is already registered"""
+    existing = tx.run("MATCH (u:User {email: $email}) RETURN u.id", {'email': user['email']}).single()
+    if existing:
+        return False
+    
+    tx.run("""
+        CREATE (u:User {
+            id: $id,
+            email: $email,
+            name: $name,
+            password_hash: $password_hash,
+            password_algo: $password_algo,
+            salt: $salt,
+            created_at: datetime(),
+            updated_at: datetime()
+        })
+    """, user)
+    return True
+
 def authenticate_user(email, password):
     """Check user credentials in Neo4j"""
     try:
-        from connection import init_neo4j, neo4j_connection
-        init_neo4j()
+        neo4j_connection = get_neo4j()
         
+        # execute_read retries transient errors (e.g. a cluster leader switch)
         with neo4j_connection.get_session() as session:
-            result = session.run("""
-                MATCH (u:User {email: $email})
-                RETURN u.password_hash as hash, u.salt as salt
-            """, {'email': email})
-            
-            record = result.single()
-            if record:
-                stored_hash = record['hash']
-                salt = record['salt']
-                input_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-                return stored_hash == input_hash.hex()
+            record = session.execute_read(_read_credentials, email)
+        
+        if record:
+            return verify_password(password, record['salt'], record['hash'], record['algo'])
             
     except Exception as e:
         st.error(f"Authentication error: {e}")
@@ -59,40 +195,23 @@ def authenticate_user(email, password):
 def register_user(email, password, name):
     """Register new user in Neo4j"""
     try:
-        from connection import init_neo4j, neo4j_connection
-        init_neo4j()
+        neo4j_connection = get_neo4j()
         
         # Generate salt and hash password
-        salt = str(uuid.uuid4())
-        password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000).hex()
+        salt = new_salt()
+        password_hash = hash_password(password, salt)
         
+        # Existence check and create run in one retried write transaction
         with neo4j_connection.get_session() as session:
-            # Check if user exists
-            existing = session.run("MATCH (u:User {email: $email}) RETURN u", {'email': email}).single()
-            if existing:
-                return False
-            
-            # Create user
-            session.run("""
-                CREATE (u:User {
-                    id: $id,
-                    email: $email,
-                    name: $name,
-                    password_hash: $password_hash,
-                    salt: $salt,
-                    created_at: datetime(),
-                    updated_at: datetime()
-                })
-            """, {
+            return session.execute_write(_create_user, {
                 'id': str(uuid.uuid4()),
                 'email': email,
                 'name': name,
                 'password_hash': password_hash,
+                'password_algo': PASSWORD_ALGO,
                 'salt': salt
             })
             
-            return True
-            
     except Exception as e:
         st.error(f"Registration error: {e}")
         return False
@@ -143,18 +262,48 @@ def simple_auth():
     
     return True
 
-def display_resume_from_database(resume_content_b64, resume_filename):
-    """Display resume content stored in database as base64"""
+def display_pdf(pdf_content, filename):
+    """Serve a PDF through a download button; inline it only when asked.
+    
+    An inlined data: URL is part of the page and is re-sent on every rerun,
+    while download_button data is served once from Streamlit's media store.
+    """
+    st.download_button(
+        "📥 Open PDF",
+        data=pdf_content,
+        file_name=filename,
+        mime="application/pdf",
+        key="resume_pdf_download"
+    )
+    
+    if st.checkbox("Show inline preview", key="resume_pdf_preview"):
+        pdf_base64 = base64.b64encode(pdf_content).decode('ascii')
+        pdf_display = f"""
+        <iframe src="data:application/pdf;base64,{pdf_base64}" 
+                width="100%" height="800px" type="application/pdf">
+            <p>Your browser doesn't support PDF viewing. Use the Open PDF button above.</p>
+        </iframe>
+        """
+        st.markdown(pdf_display, unsafe_allow_html=True)
+
+# Leading bytes of the stored formats; DOCX files are ZIP archives
+FILE_SIGNATURES = {
+    b'%PDF': '.pdf',
+    b'PK\x03\x04': '.docx',
+}
+
+def detect_file_type(content, filename):
+    """File type from the content's magic bytes, falling back to the filename extension"""
+    return FILE_SIGNATURES.get(content[:4], Path(filename).suffix.lower())
+
+def display_resume_from_database(resume_content, resume_filename, extracted_text=None):
+    """Display resume content stored in the database (extracted_text skips re-parsing DOCX previews)"""
     
     st.header("📄 Original Resume")
     
     try:
-        import base64
-        
-        # Decode the base64 content
-        resume_content = base64.b64decode(resume_content_b64)
         file_size = len(resume_content)
-        file_extension = Path(resume_filename).suffix.lower()
+        file_extension = detect_file_type(resume_content, resume_filename)
         
         st.success("✅ Resume loaded from database")
         st.info(f"**File:** {resume_filename}")
@@ -165,18 +314,7 @@ def display_resume_from_database(resume_content_b64, resume_filename):
         # Display content in browser based on file type
         if file_extension == '.pdf':
             st.subheader("📖 PDF Viewer")
-            # Display PDF directly in browser using base64
-            pdf_base64 = base64.b64encode(resume_content).decode('utf-8')
-            pdf_display = f"""
-            <iframe src="data:application/pdf;base64,{pdf_base64}" 
-                    width="100%" height="800px" type="application/pdf">
-                <p>Your browser doesn't support PDF viewing. 
-                   <a href="data:application/pdf;base64,{pdf_base64}" download="{resume_filename}">
-                   Click here to download the PDF</a>
-                </p>
-            </iframe>
-            """
-            st.markdown(pdf_display, unsafe_allow_html=True)
+            display_pdf(resume_content, resume_filename)
             
         elif file_extension in ['.txt']:
             st.subheader("📝 Text Content:")
@@ -190,31 +328,21 @@ def display_resume_from_database(resume_content_b64, resume_filename):
             st.subheader("📄 Word Document")
             st.info("Word documents cannot be displayed directly in browser, but you can download it above.")
             
-            # Try to extract and show text content
+            # Show the text saved with the analysis, extracting only for older records
             try:
-                # Save temporarily to extract text
-                import tempfile
-                with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as tmp_file:
-                    tmp_file.write(resume_content)
-                    tmp_file_path = tmp_file.name
-                
-                from text_extractor import DocumentTextExtractor
-                extractor = DocumentTextExtractor()
-                extraction_result = extractor.extract_text(tmp_file_path)
-                
-                # Handle tuple return (text, metadata) or just text
-                if isinstance(extraction_result, tuple):
-                    extracted_text = extraction_result[0]
-                else:
-                    extracted_text = extraction_result
+                if not extracted_text:
+                    extractor = get_extractor()
+                    extraction_result = extractor.extract_text_from_stream(io.BytesIO(resume_content), '.docx', resume_filename)
+                    
+                    # Handle tuple return (text, metadata) or just text
+                    if isinstance(extraction_result, tuple):
+                        extracted_text = extraction_result[0]
+                    else:
+                        extracted_text = extraction_result
                 
                 if extracted_text:
                     st.subheader("📝 Text Preview:")
                     st.text_area("Extracted Content", extracted_text, height=600, disabled=True)
-                
-                # Clean up temp file
-                import os
-                os.unlink(tmp_file_path)
                         
             except Exception as e:
                 st.warning(f"Could not extract text for preview: {e}")
@@ -260,20 +388,7 @@ def display_original_resume(resume_file_path):
         if file_extension == '.pdf':
             st.subheader("📖 PDF Viewer")
             try:
-                import base64
-                with open(file_path, 'rb') as file:
-                    pdf_content = file.read()
-                    pdf_base64 = base64.b64encode(pdf_content).decode('utf-8')
-                    pdf_display = f"""
-                    <iframe src="data:application/pdf;base64,{pdf_base64}" 
-                            width="100%" height="800px" type="application/pdf">
-                        <p>Your browser doesn't support PDF viewing. 
-                           <a href="data:application/pdf;base64,{pdf_base64}" download="{file_path.name}">
-                           Click here to download the PDF</a>
-                        </p>
-                    </iframe>
-                    """
-                    st.markdown(pdf_display, unsafe_allow_html=True)
+                display_pdf(file_path.read_bytes(), file_path.name)
             except Exception as e:
                 st.error(f"Could not display PDF: {e}")
             
@@ -292,8 +407,7 @@ def display_original_resume(resume_file_path):
             
             # Try to extract text for preview (optional)
             try:
-                from text_extractor import DocumentTextExtractor
-                extractor = DocumentTextExtractor()
+                extractor = get_extractor()
                 extraction_result = extractor.extract_text(str(file_path))
                 
                 # Handle tuple return (text, metadata) or just text
@@ -315,157 +429,206 @@ def display_original_resume(resume_file_path):
         st.error(f"Error displaying resume: {e}")
         st.info("💡 This is likely because the deployment environment doesn't persist uploaded files.")
 
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_analyses(email):
+    """Saved analyses for a user, newest first, as plain dicts (cached between reruns)"""
+    neo4j_connection = get_neo4j()
+    with neo4j_connection.get_session() as session:
+        result = session.run("""
+            MATCH (u:User {email: $email})-[:HAS_ANALYSIS]->(a:Analysis)
+            RETURN a.id as id, toString(a.created_at) as created_at, 
+                   a.data as data, a.resume_name as name,
+                   a.resume_file_path as resume_file_path,
+                   a.resume_bytes IS NOT NULL OR a.resume_content_b64 IS NOT NULL as has_resume_content,
+                   a.resume_filename as resume_filename,
+                   a.extracted_text as extracted_text
+            ORDER BY a.created_at DESC
+        """, {'email': email})
+        return [record.data() for record in result]
+
+@st.cache_data(ttl=300, max_entries=8, show_spinner=False)
+def fetch_resume_content(analysis_id):
+    """Original resume bytes stored on an analysis, loaded only when viewed"""
+    neo4j_connection = get_neo4j()
+    with neo4j_connection.get_session() as session:
+        record = session.run("""
+            MATCH (a:Analysis {id: $id})
+            RETURN a.resume_bytes as content, a.resume_content_b64 as content_b64
+        """, {'id': analysis_id}).single()
+    
+    if not record:
+        return None
+    if record['content'] is not None:
+        return bytes(record['content'])
+    if record['content_b64']:
+        # Analyses saved before resumes were stored as raw bytes
+        return base64.b64decode(record['content_b64'])
+    return None
+
+def delete_analyses(analysis_ids):
+    """Delete saved analyses in a single round trip"""
+    neo4j_connection = get_neo4j()
+    with neo4j_connection.get_session() as session:
+        session.run("""
+            UNWIND $ids AS id
+            MATCH (a:Analysis {id: id})
+            DETACH DELETE a
+        """, {'ids': list(analysis_ids)})
+    fetch_analyses.clear()
+
+def existing_resume_files(file_paths):
+    """Subset of file_paths that exist, using one directory listing per folder instead of a stat per file"""
+    by_dir = {}
+    for file_path in filter(None, file_paths):
+        directory, name = os.path.split(file_path)
+        by_dir.setdefault(directory or '.', {})[name] = file_path
+    
+    existing = set()
+    for directory, names in by_dir.items():
+        try:
+            with os.scandir(directory) as entries:
+                existing.update(names[entry.name] for entry in entries if entry.name in names)
+        except OSError:
+            continue  # Missing or unreadable folder: none of its files are available
+    return existing
+
 def show_user_analyses():
     """Show user's saved resume analyses"""
     
     st.header("My Saved Analyses")
     
     try:
-        from connection import init_neo4j, neo4j_connection
-        init_neo4j()
-        
         user_email = st.session_state.user_email
         
-        with neo4j_connection.get_session() as session:
-            result = session.run("""
-                MATCH (u:User {email: $email})-[:HAS_ANALYSIS]->(a:Analysis)
-                RETURN a.id as id, a.created_at as created_at, 
-                       a.data as data, a.resume_name as name,
-                       a.resume_file_path as resume_file_path,
-                       coalesce(a.resume_content_b64, null) as resume_content_b64,
-                       coalesce(a.resume_filename, null) as resume_filename
-                ORDER BY a.created_at DESC
-            """, {'email': user_email})
-            
-            analyses = list(result)
-            
-            if not analyses:
-                st.info("No saved analyses yet. Upload a resume to get started!")
-                return
-            
-            st.write(f"Found {len(analyses)} saved analyses:")
+        analyses = fetch_analyses(user_email)
+        
+        if not analyses:
+            st.info("No saved analyses yet. Upload a resume to get started!")
+            return
+        
+        st.write(f"Found {len(analyses)} saved analyses:")
+        
+        existing_files = existing_resume_files(a.get('resume_file_path') for a in analyses)
+        
+        def resume_status(analysis):
+            if analysis.get('has_resume_content') or analysis.get('resume_file_path') in existing_files:
+                return "📄 Available"
+            if analysis.get('resume_file_path'):
+                return "⚠️ File missing"
+            return "N/A"
+        
+        # One table with row selection instead of an expander and buttons per analysis
+        import pandas as pd  # Deferred: only needed once there are saved analyses
+        analyses_df = pd.DataFrame([{
+            'Name': a['name'] or "Unknown",
+            'Created': str(a['created_at'])[:19],
+            'Resume': resume_status(a)
+        } for a in analyses])
+        
+        event = st.dataframe(
+            analyses_df,
+            hide_index=True,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="multi-row",
+            key="analyses_table"
+        )
+        selected = [analyses[row] for row in event.selection.rows if row < len(analyses)]
+        
+        if not selected:
+            st.caption("Select a row to view it, or several rows to delete them together.")
+        else:
+            col1, col2, col3 = st.columns(3)
             
-            for analysis in analyses:
-                created_at = analysis['created_at']
-                name = analysis['name'] or "Unknown"
+            if len(selected) == 1:
+                analysis = selected[0]
                 resume_file_path = analysis.get('resume_file_path')
-                resume_content_b64 = analysis.get('resume_content_b64')
-                resume_filename = analysis.get('resume_filename')
                 
-                with st.expander(f"{name} - {str(created_at)[:19]}"):
-                    # Create columns for better button layout
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        if st.button(f"📊 View Analysis", key=f"view_{analysis['id']}", use_container_width=True):
-                            # Set a session state flag to show analysis outside expander
-                            st.session_state[f"show_analysis_{analysis['id']}"] = True
-                            st.session_state.current_analysis_data = analysis['data']
+                with col1:
+                    if st.button(f"📊 View Analysis", key=f"view_{analysis['id']}", use_container_width=True):
+                        # Remember which analysis to show below the table
+                        st.session_state.view_analysis_id = analysis['id']
+                        st.rerun()
+                
+                with col2:
+                    if resume_status(analysis) == "📄 Available":
+                        if st.button(f"📄 View Resume", key=f"resume_{analysis['id']}", use_container_width=True):
+                            # Remember which resume to show below the table
+                            st.session_state.view_resume_id = analysis['id']
                             st.rerun()
-                    
-                    with col2:
-                        # Check what resume data we have
-                        resume_content_b64 = analysis.get('resume_content_b64')
-                        resume_filename = analysis.get('resume_filename') 
-                        resume_file_path = analysis.get('resume_file_path')
-                        
-                        # Determine if we can show resume
-                        has_database_content = resume_content_b64 is not None
-                        has_file_path = resume_file_path is not None
-                        file_exists = Path(resume_file_path).exists() if resume_file_path else False
-                        
-                        can_show_resume = has_database_content or file_exists
-                        
-                        if can_show_resume:
-                            if st.button(f"📄 View Resume", key=f"resume_{analysis['id']}", use_container_width=True):
-                                # Set session state for resume viewing
-                                st.session_state[f"show_resume_{analysis['id']}"] = True
-                                st.session_state.current_resume_path = resume_file_path
-                                st.session_state.current_resume_content_b64 = resume_content_b64
-                                st.session_state.current_resume_filename = resume_filename or (Path(resume_file_path).name if resume_file_path else None)
-                                st.rerun()
-                        else:
-                            # Show appropriate disabled button based on what's missing
-                            if has_file_path and not file_exists:
-                                st.button(f"📄 File Missing", key=f"resume_missing_{analysis['id']}", disabled=True, use_container_width=True)
-                                st.caption("File not found in deployment")
-                            else:
-                                st.button(f"📄 Resume N/A", key=f"resume_na_{analysis['id']}", disabled=True, use_container_width=True)
-                    
-                    with col3:
-                        if st.button(f"🗑️ Delete", key=f"delete_{analysis['id']}", type="secondary", use_container_width=True):
-                            # Delete the analysis using a separate session state to avoid conflicts
-                            try:
-                                with neo4j_connection.get_session() as delete_session:
-                                    delete_session.run("MATCH (a:Analysis {id: $id}) DETACH DELETE a", 
-                                                      {'id': analysis['id']})
-                                st.success("Analysis deleted!")
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"Error deleting analysis: {e}")
+                    elif resume_file_path:
+                        st.button(f"📄 File Missing", key=f"resume_missing_{analysis['id']}", disabled=True, use_container_width=True)
+                        st.caption("File not found in deployment")
+                    else:
+                        st.button(f"📄 Resume N/A", key=f"resume_na_{analysis['id']}", disabled=True, use_container_width=True)
             
-            # Display analysis results outside expander for full width
-            for analysis in analyses:
-                analysis_key = f"show_analysis_{analysis['id']}"
-                if st.session_state.get(analysis_key, False):
-                    st.markdown("---")
+            with col3:
+                # All selected analyses go in one UNWIND query
+                delete_label = "🗑️ Delete" if len(selected) == 1 else f"🗑️ Delete {len(selected)} Selected"
+                if st.button(delete_label, type="secondary", use_container_width=True):
                     try:
-                        saved_data = json.loads(st.session_state.get('current_analysis_data', '{}'))
-                        display_analysis_results(saved_data)
-                        
-                        # Add a button to hide the analysis
-                        if st.button("❌ Hide Analysis", key=f"hide_analysis_{analysis['id']}"):
-                            st.session_state[analysis_key] = False
-                            if 'current_analysis_data' in st.session_state:
-                                del st.session_state.current_analysis_data
-                            st.rerun()
-                            
-                    except json.JSONDecodeError as e:
-                        st.error(f"Error loading analysis data: {e}")
+                        delete_analyses([a['id'] for a in selected])
+                        st.success("Analysis deleted!" if len(selected) == 1 else f"Deleted {len(selected)} analyses!")
+                        # Row positions shift after a delete, so drop the old selection
+                        del st.session_state.analyses_table
+                        st.rerun()
                     except Exception as e:
-                        st.error(f"Error displaying analysis: {e}")
-                    break  # Only show one analysis at a time
-            
-            # Display resume outside expander for full width
-            for analysis in analyses:
-                resume_key = f"show_resume_{analysis['id']}"
-                if st.session_state.get(resume_key, False):
-                    st.markdown("---")
-                    
-                    # Get resume data from session state
-                    resume_content_b64 = st.session_state.get('current_resume_content_b64')
-                    resume_filename = st.session_state.get('current_resume_filename') 
-                    resume_path = st.session_state.get('current_resume_path')
-                    
-                    # Try database content first (for new records), then file path (for old records)
-                    if resume_content_b64 and resume_filename:
-                        display_resume_from_database(resume_content_b64, resume_filename)
-                    elif resume_path and Path(resume_path).exists():
-                        display_original_resume(resume_path)
-                    elif resume_path:
-                        # File path exists but file is missing (common in deployment)
-                        st.header("📄 Original Resume")
-                        st.error("⚠️ Resume file not found in deployment environment")
-                        st.info(f"**Expected Path:** {resume_path}")
-                        st.info("💡 **Note:** This resume was uploaded before we added database storage. The file was stored locally but deployment environments don't persist files.")
-                        st.markdown("""
-                        **To access this resume:**
-                        1. Re-upload the same resume to get it stored in the database
-                        2. The new upload will have download capability in deployment
-                        """)
-                    else:
-                        st.error("No resume content available")
+                        st.error(f"Error deleting analyses: {e}")
+        
+        analyses_by_id = {a['id']: a for a in analyses}
+        
+        # Display analysis results below the table at full width
+        analysis = analyses_by_id.get(st.session_state.get('view_analysis_id'))
+        if analysis:
+            st.markdown("---")
+            try:
+                saved_data = parse_json(analysis['data'] or '{}')
+                display_analysis_results(saved_data)
+                
+                # Add a button to hide the analysis
+                if st.button("❌ Hide Analysis", key=f"hide_analysis_{analysis['id']}"):
+                    del st.session_state.view_analysis_id
+                    st.rerun()
                     
-                    # Add a button to hide the resume
-                    if st.button("❌ Hide Resume", key=f"hide_resume_{analysis['id']}"):
-                        st.session_state[resume_key] = False
-                        # Clean up session state
-                        for key in ['current_resume_path', 'current_resume_content_b64', 'current_resume_filename']:
-                            if key in st.session_state:
-                                del st.session_state[key]
-                        st.rerun()
-                    break  # Only show one resume at a time
+            except json.JSONDecodeError as e:
+                st.error(f"Error loading analysis data: {e}")
+            except Exception as e:
+                st.error(f"Error displaying analysis: {e}")
+        
+        # Display resume below the table at full width
+        analysis = analyses_by_id.get(st.session_state.get('view_resume_id'))
+        if analysis:
+            st.markdown("---")
             
+            resume_path = analysis.get('resume_file_path')
+            resume_filename = analysis.get('resume_filename') or (Path(resume_path).name if resume_path else None)
+            resume_in_db = analysis.get('has_resume_content', False)
+            resume_content = fetch_resume_content(analysis['id']) if resume_in_db and resume_filename else None
+            
+            # Try database content first (for new records), then file path (for old records)
+            if resume_content:
+                display_resume_from_database(resume_content, resume_filename, analysis.get('extracted_text'))
+            elif resume_path and resume_path in existing_files:
+                display_original_resume(resume_path)
+            elif resume_path:
+                # File path exists but file is missing (common in deployment)
+                st.header("📄 Original Resume")
+                st.error("⚠️ Resume file not found in deployment environment")
+                st.info(f"**Expected Path:** {resume_path}")
+                st.info("💡 **Note:** This resume was uploaded before we added database storage. The file was stored locally but deployment environments don't persist files.")
+                st.markdown("""
+                **To access this resume:**
+                1. Re-upload the same resume to get it stored in the database
+                2. The new upload will have download capability in deployment
+                """)
+            else:
+                st.error("No resume content available")
+            
+            # Add a button to hide the resume
+            if st.button("❌ Hide Resume", key=f"hide_resume_{analysis['id']}"):
+                del st.session_state.view_resume_id
+                st.rerun()
+        
     except Exception as e:
         st.error(f"Error loading analyses: {e}")
         import traceback
@@ -480,7 +643,7 @@ st.set_page_config(
 )
 
 # Minimal CSS - let Streamlit handle dark mode
-st.markdown("""
+APP_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -503,7 +666,11 @@ st.markdown("""
         border-radius: 0.5rem;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Emitted on every rerun: Streamlit drops elements a rerun does not re-emit,
+# so a run-once guard would lose the styles after the first interaction
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 def main():
     """Main Streamlit app"""
@@ -564,21 +731,19 @@ def upload_and_analyze_page():
 def process_resume(uploaded_file):
     """Process the uploaded resume"""
     
-    temp_file_path = None
-    
     try:
         # Show file info
         st.success(f"✅ File uploaded: {uploaded_file.name} ({uploaded_file.size} bytes)")
         
-        # Save to temp file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(uploaded_file.name).suffix) as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            temp_file_path = tmp_file.name
-        
-        # Extract text
+        # Extract text straight from the in-memory upload; identical files reuse the cached text
         with st.spinner("📖 Extracting text from document..."):
-            extractor = DocumentTextExtractor()
-            extraction_result = extractor.extract_text(temp_file_path)
+            file_content = uploaded_file.getvalue()
+            extraction_result = extract_upload_text(
+                content_fingerprint(file_content),
+                Path(uploaded_file.name).suffix.lower(),
+                file_content,
+                uploaded_file.name
+            )
             
             # Handle tuple return (text, metadata) or just text
             if isinstance(extraction_result, tuple):
@@ -595,22 +760,26 @@ def process_resume(uploaded_file):
         # AI Analysis
         with st.spinner("🤖 Running AI analysis..."):
             try:
-                from secrets_helper import GEMINI_API_KEY
-                analysis_result = extract_resume_with_gemini(extracted_text, GEMINI_API_KEY)
+                analysis_result = analyze_resume_text(content_fingerprint(extracted_text), extracted_text)
                 
-                if not analysis_result:
-                    st.error("❌ AI analysis failed - no result returned")
-                    return
-                
-                # Adapt for storage
-                adapted_data = adapt_gemini_output_for_neo4j(analysis_result)
+                # Adapt for storage only when it will actually be stored;
+                # the display reads both shapes
+                want_store = NEO4J_STORAGE_AVAILABLE and st.session_state.get('authenticated')
+                display_data = adapt_gemini_output_for_neo4j(analysis_result) if want_store else analysis_result
                 
                 # Display results
-                display_analysis_results(adapted_data)
+                display_analysis_results(display_data)
                 
-                # Save to file
-                result_file = save_results_to_file(adapted_data, uploaded_file.name)
+                # Save to file and offer the same bytes for download
+                results_json = results_to_json(display_data)
+                result_file = save_results_to_file(results_json, uploaded_file.name)
                 st.info(f"💾 Results saved to: {result_file}")
+                st.download_button(
+                    "⬇️ Download Analysis (JSON)",
+                    data=results_json,
+                    file_name=result_file.name,
+                    mime="application/json"
+                )
                 
                 # Save the original resume file
                 resume_file = save_resume_file(uploaded_file)
@@ -622,7 +791,7 @@ def process_resume(uploaded_file):
                 # Try to save to Neo4j if available and user is authenticated
                 if st.session_state.get('authenticated'):
                     with st.spinner("💾 Saving to your profile..."):
-                        try_neo4j_storage(adapted_data, str(resume_file) if resume_file else None)
+                        try_neo4j_storage(display_data, str(resume_file) if resume_file else None, extracted_text)
                 
             except Exception as analysis_error:
                 st.error(f"❌ AI analysis failed: {analysis_error}")
@@ -632,16 +801,8 @@ def process_resume(uploaded_file):
         st.error(f"❌ Processing failed: {e}")
         import traceback
         st.error(traceback.format_exc())
-    
-    finally:
-        # Clean up temp file
-        if 'temp_file_path' in locals() and temp_file_path:
-            try:
-                os.unlink(temp_file_path)
-            except:
-                pass
 
-def try_neo4j_storage(adapted_data, resume_file_path=None):
+def try_neo4j_storage(adapted_data, resume_file_path=None, extracted_text=None):
     """Store analysis linked to authenticated user"""
     
     if not NEO4J_STORAGE_AVAILABLE:
@@ -652,19 +813,16 @@ def try_neo4j_storage(adapted_data, resume_file_path=None):
         # Get the authenticated user's email
         user_email = st.session_state.user_email
         
-        from connection import init_neo4j, neo4j_connection
-        init_neo4j()
+        neo4j_connection = get_neo4j()
         
-        # Try to store resume content as base64 for deployment environments
-        resume_content_b64 = None
+        # Store the raw resume bytes (a Neo4j byte array) for deployment environments
+        resume_content = None
         resume_filename = None
         
         if resume_file_path and Path(resume_file_path).exists():
             try:
-                with open(resume_file_path, 'rb') as f:
-                    import base64
-                    resume_content_b64 = base64.b64encode(f.read()).decode('utf-8')
-                    resume_filename = Path(resume_file_path).name
+                resume_content = Path(resume_file_path).read_bytes()
+                resume_filename = Path(resume_file_path).name
                 st.info("📦 Resume content stored in database for deployment compatibility")
             except Exception as e:
                 st.warning(f"Could not store resume content: {e}")
@@ -680,27 +838,90 @@ def try_neo4j_storage(adapted_data, resume_file_path=None):
                     data: $analysis_data,
                     resume_name: $resume_name,
                     resume_file_path: $resume_file_path,
-                    resume_content_b64: $resume_content_b64,
-                    resume_filename: $resume_filename
+                    resume_bytes: $resume_content,
+                    resume_filename: $resume_filename,
+                    extracted_text: $extracted_text
                 })
                 CREATE (u)-[:HAS_ANALYSIS]->(a)
                 RETURN a
             """, {
                 'email': user_email,
                 'analysis_id': analysis_id,
-                'analysis_data': json.dumps(adapted_data),
+                'analysis_data': compact_json(adapted_data),
                 'resume_name': adapted_data.get('personal_info', {}).get('name', 'Unknown'),
                 'resume_file_path': resume_file_path,
-                'resume_content_b64': resume_content_b64,
-                'resume_filename': resume_filename
+                'resume_content': resume_content,
+                'resume_filename': resume_filename,
+                'extracted_text': extracted_text
             })
             
+        fetch_analyses.clear()
         st.success(f"Analysis saved to your profile!")
         st.info(f"Saved for: {user_email}")
         
     except Exception as e:
         st.error(f"Save failed: {e}")
 
+def truncate(text, limit):
+    """Shorten text to at most limit characters, ending in '...' when cut"""
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+TOP_SKILLS = 10
+
+def as_float(value):
+    """Numeric value, or NaN for missing/non-numeric confidences"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def skills_view(tech_skills):
+    """Category counts and top skills rows for the skills section, cached across reruns"""
+    categories = Counter(skill['category'] for skill in tech_skills if skill.get('category') is not None)
+    category_counts = tuple(categories.most_common())
+    
+    if any('confidence' in skill for skill in tech_skills):
+        # Highest confidence first, like nlargest: the stable sort keeps tied skills in
+        # resume order, and skills without a numeric confidence only fill remaining rows
+        confidence = np.fromiter((as_float(skill.get('confidence')) for skill in tech_skills),
+                                 dtype=float, count=len(tech_skills))
+        ranked = np.nan_to_num(confidence, nan=-np.inf)
+        top = np.argsort(-ranked, kind='stable')[:TOP_SKILLS]
+        rows = [tech_skills[i] for i in top]
+        columns = ('skill', 'proficiency', 'confidence')
+    else:
+        rows = tech_skills[:TOP_SKILLS]
+        columns = ('skill', 'category')
+    
+    top_skills = [{column: row.get(column) for column in columns} for row in rows]
+    return category_counts, top_skills
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def skills_pie(category_counts):
+    """Skills-by-category pie chart, built once per set of (category, count) pairs"""
+    import plotly.express as px  # Deferred: only the skills section draws charts
+    
+    fig = px.pie(
+        values=[count for _, count in category_counts],
+        names=[category for category, _ in category_counts],
+        title="Skills by Category",
+        color_discrete_sequence=px.colors.qualitative.Set3  # Better colors for dark mode
+    )
+    # Update layout for dark mode
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font_color='white'
+    )
+    return fig
+
+EXPERIENCE_PAGE_SIZE = 5
+
+def show_more_experience(state_key):
+    """Button callback: reveal the next page of work experience entries for one analysis"""
+    st.session_state[state_key] = st.session_state.get(state_key, EXPERIENCE_PAGE_SIZE) + EXPERIENCE_PAGE_SIZE
+
 def display_analysis_results(analysis_data):
     """Display the analysis results in a beautiful format"""
     
@@ -713,28 +934,20 @@ def display_analysis_results(analysis_data):
         
         col1, col2, col3 = st.columns(3)
         with col1:
-            name = personal.get('name', 'Not found')
-            if len(name) > 15:
-                name = name[:12] + "..."
-            st.metric("🎓 Name", name)
+            st.metric("🎓 Name", truncate(personal.get('name') or 'Not found', 15))
         with col2:
-            education = f"{personal.get('education_level', '')} {personal.get('field_of_study', '')}"
-            if len(education) > 20:
-                education = education[:17] + "..."
-            st.metric("📚 Education", education)
+            education = f"{personal.get('education_level') or ''} {personal.get('field_of_study') or ''}"
+            st.metric("📚 Education", truncate(education, 20))
         with col3:
-            university = personal.get('university', 'Not found')
-            if len(university) > 15:
-                university = university[:12] + "..."
-            st.metric("🏫 University", university)
+            st.metric("🏫 University", truncate(personal.get('university') or 'Not found', 15))
     
     # Technical skills
     tech_skills = analysis_data.get('technical_skills', [])
     if tech_skills:
         st.subheader("🛠️ Technical Skills")
         
-        # Create skills dataframe for visualization
-        skills_df = pd.DataFrame(tech_skills)
+        # Category counts and top skills (cached per skills list)
+        category_counts, top_skills = skills_view(tech_skills)
         
         col1, col2 = st.columns(2)
         
@@ -742,29 +955,12 @@ def display_analysis_results(analysis_data):
             st.metric("📊 Total Skills", len(tech_skills))
             
             # Skills by category
-            if 'category' in skills_df.columns:
-                category_counts = skills_df['category'].value_counts()
-                fig = px.pie(
-                    values=category_counts.values,
-                    names=category_counts.index,
-                    title="Skills by Category",
-                    color_discrete_sequence=px.colors.qualitative.Set3  # Better colors for dark mode
-                )
-                # Update layout for dark mode
-                fig.update_layout(
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font_color='white'
-                )
-                st.plotly_chart(fig, use_container_width=True)
+            if category_counts:
+                st.plotly_chart(skills_pie(category_counts), use_container_width=True)
         
         with col2:
             # Top skills
-            if 'confidence' in skills_df.columns:
-                top_skills = skills_df.nlargest(10, 'confidence')[['skill', 'proficiency', 'confidence']]
-                st.dataframe(top_skills, use_container_width=True)
-            else:
-                st.dataframe(skills_df[['skill', 'category']][:10], use_container_width=True)
+            st.table(top_skills)
     
     # Projects
     projects = analysis_data.get('projects', [])
@@ -773,46 +969,53 @@ def display_analysis_results(analysis_data):
         
         for i, project in enumerate(projects[:5]):  # Show top 5 projects
             with st.expander(f"📋 {project.get('title', f'Project {i+1}')}"):
-                st.write(f"**Domain:** {project.get('domain', 'Not specified')}")
-                st.write(f"**Complexity:** {project.get('complexity', 'Not specified')}")
-                st.write(f"**Description:** {project.get('description', 'No description')}")
+                # One markdown block per expander instead of a write per field
+                lines = [
+                    f"**Domain:** {project.get('domain', 'Not specified')}",
+                    f"**Complexity:** {project.get('complexity', 'Not specified')}",
+                    f"**Description:** {project.get('description', 'No description')}"
+                ]
                 
                 technologies = project.get('technologies', [])
                 if technologies:
-                    st.write(f"**Technologies:** {', '.join(technologies)}")
+                    lines.append(f"**Technologies:** {', '.join(technologies)}")
+                
+                st.markdown("\n\n".join(lines))
     
     # Work Experience (includes internships and other experience)
     experience = analysis_data.get('experience', [])
     internships = analysis_data.get('internships', [])
     
-    # Combine all experience types, avoiding duplicates
-    all_experience = []
-    if experience:
-        all_experience.extend(experience)
-    
-    if internships:
-        # Add internships that aren't already in experience array
-        for internship in internships:
-            # Check if this internship is already in experience by comparing key fields
-            is_duplicate = False
-            for exp in experience:
-                if (exp.get('company') == internship.get('company') and 
-                    exp.get('role') == internship.get('role') and
-                    exp.get('duration') == internship.get('duration')):
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
-                all_experience.append(internship)
+    # Combine all experience types, skipping internships already in experience
+    # (matched on company, role and duration)
+    def experience_key(entry):
+        return (entry.get('company'), entry.get('role'), entry.get('duration'))
+    
+    seen = {experience_key(exp) for exp in experience}
+    all_experience = [(exp, 'experience') for exp in experience]
+    all_experience += [(internship, 'internship') for internship in internships
+                       if experience_key(internship) not in seen]
     
     if all_experience:
         st.subheader("💼 Work Experience")
         
-        for i, exp in enumerate(all_experience):
+        # Render a page of expanders at a time; "Show more" reveals the next page.
+        # Counted per set of entries, so another analysis starts from the first page
+        experience_id = content_fingerprint(repr([experience_key(exp) for exp, _ in all_experience]))
+        state_key = f"experience_shown_{experience_id}"
+        shown = st.session_state.setdefault(state_key, EXPERIENCE_PAGE_SIZE)
+        
+        for i, (exp, default_type) in enumerate(all_experience[:shown]):
             # Determine title based on available fields
             company = exp.get('company', f'Experience {i+1}')
             role = exp.get('role', exp.get('position', 'Role not specified'))
-            exp_type = exp.get('type', 'internship' if 'internship' in str(exp).lower() else 'experience')
+            # Only sniff role/company when the entry doesn't say what it is
+            exp_type = exp.get('type')
+            if not exp_type:
+                is_internship = default_type == 'internship' or any(
+                    'internship' in str(field).lower() for field in (role, company)
+                )
+                exp_type = 'internship' if is_internship else 'experience'
             
             # Create display title
             if exp_type == 'internship':
@@ -821,29 +1024,40 @@ def display_analysis_results(analysis_data):
                 title = f"🏢 {role} - {company}"
             
             with st.expander(title):
-                st.write(f"**Duration:** {exp.get('duration', 'Not specified')}")
-                st.write(f"**Status:** {exp.get('status', 'Not specified').title()}")
-                
                 # Handle both 'responsibilities' and 'description' fields
                 description = exp.get('responsibilities', exp.get('description', 'No description'))
-                st.write(f"**Description:** {description}")
+                
+                # One markdown block per expander instead of a write per field
+                lines = [
+                    f"**Duration:** {exp.get('duration', 'Not specified')}",
+                    f"**Status:** {exp.get('status', 'Not specified').title()}",
+                    f"**Description:** {description}"
+                ]
                 
                 # Technologies used
                 technologies = exp.get('technologies', [])
                 if technologies:
-                    st.write(f"**Technologies:** {', '.join(technologies)}")
+                    lines.append(f"**Technologies:** {', '.join(technologies)}")
                 
                 # Skills used (alternative field name)
                 skills_used = exp.get('skills_used', [])
                 if skills_used:
-                    st.write(f"**Skills Used:** {', '.join(skills_used)}")
+                    lines.append(f"**Skills Used:** {', '.join(skills_used)}")
                 
                 # Achievements if available
                 achievements = exp.get('achievements', [])
                 if achievements:
-                    st.write("**Key Achievements:**")
-                    for achievement in achievements:
-                        st.write(f"• {achievement}")
+                    lines.append("**Key Achievements:**\n" + "\n".join(f"- {achievement}" for achievement in achievements))
+                
+                st.markdown("\n\n".join(lines))
+        
+        if shown < len(all_experience):
+            st.button(
+                f"Show more ({len(all_experience) - shown} remaining)",
+                key=f"experience_show_more_{experience_id}",
+                on_click=show_more_experience,
+                args=(state_key,)
+            )
     
     # Experience level and summary
     exp_level = analysis_data.get('experience_level', {})
@@ -864,6 +1078,31 @@ def display_analysis_results(analysis_data):
                 strength = summary.get('profile_strength', 'Unknown').upper()
                 st.metric("💪 Strength", strength[:8])  # Truncate long text
 
+@st.cache_data(ttl=30, show_spinner=False)
+def analytics_counts():
+    """Dashboard counts, refreshed at most every 30 seconds"""
+    neo4j_connection = get_neo4j()
+    
+    with neo4j_connection.get_session() as session:
+        # All dashboard counts in one round trip. The first two subqueries
+        # are answered from Neo4j's count store; keep them bare label counts
+        # (no WHERE/WITH) and put any filtered count in its own subquery
+        return session.run("""
+            CALL { MATCH (a:Analysis) RETURN count(a) as total_analyses }
+            CALL { MATCH (u:User) RETURN count(u) as total_users }
+            CALL {
+                MATCH (a:Analysis)
+                WHERE a.data IS NOT NULL
+                RETURN count(a) as analyses_with_skills
+            }
+            CALL {
+                MATCH (a:Analysis)
+                WHERE a.created_at >= datetime() - duration('P30D')
+                RETURN count(a) as recent_analyses
+            }
+            RETURN total_analyses, total_users, analyses_with_skills, recent_analyses
+        """).single().data()
+
 def analytics_dashboard_page():
     """Analytics dashboard showing processed resumes"""
     
@@ -877,42 +1116,15 @@ def analytics_dashboard_page():
     connection_status = "❌ Unknown"
     
     try:
-        from connection import init_neo4j, neo4j_connection
+        counts = analytics_counts()
         
-        # Test Neo4j connection first
-        init_neo4j()
+        total_analyses = counts['total_analyses']
+        total_users = counts['total_users']
+        recent_analyses = counts['recent_analyses']
+        
+        # Estimate unique skills (rough calculation)
+        estimated_skills = counts['analyses_with_skills'] * 12  # Average skills per resume
         
-        with neo4j_connection.get_session() as session:
-            # Test the connection with a simple query first
-            test_result = session.run("RETURN 1 as test").single()
-            
-            # Get total analyses count
-            analyses_result = session.run("MATCH (a:Analysis) RETURN count(a) as total_analyses")
-            total_analyses = analyses_result.single()['total_analyses']
-            
-            # Get unique users count
-            users_result = session.run("MATCH (u:User) RETURN count(u) as total_users")
-            total_users = users_result.single()['total_users']
-            
-            # Get unique skills count (approximate from analysis data)
-            skills_result = session.run("""
-            MATCH (a:Analysis)
-            WHERE a.data IS NOT NULL
-            RETURN count(a) as analyses_with_skills
-        """)
-            analyses_with_skills = skills_result.single()['analyses_with_skills']
-            
-            # Estimate unique skills (rough calculation)
-            estimated_skills = analyses_with_skills * 12  # Average skills per resume
-            
-            # Get analyses from last 30 days
-            recent_result = session.run("""
-                MATCH (a:Analysis)
-                WHERE a.created_at >= datetime() - duration('P30D')
-                RETURN count(a) as recent_analyses
-            """)
-            recent_analyses = recent_result.single()['recent_analyses']
-            
         connection_status = "✅ Connected"
         st.success("📊 Analytics loaded successfully!")
         
@@ -978,8 +1190,9 @@ def settings_page():
     3. **Environment Variables**: Add to `.streamlit/secrets.toml` for deployment
     """)
 
-def save_resume_file(uploaded_file):
-    """Save the uploaded resume file to local storage"""
+@st.cache_resource(show_spinner=False)
+def get_resumes_dir():
+    """First writable resumes directory, probed once per process"""
     
     # Try to create resumes directory in multiple possible locations
     possible_dirs = [
@@ -989,34 +1202,40 @@ def save_resume_file(uploaded_file):
         Path("/app/resumes")  # Common in containerized deployments
     ]
     
-    resumes_dir = None
     for dir_path in possible_dirs:
         try:
             dir_path.mkdir(exist_ok=True, parents=True)
-            # Test if we can write to this directory
-            test_file = dir_path / "test_write.tmp"
-            test_file.write_text("test")
-            test_file.unlink()
-            resumes_dir = dir_path
-            break
         except Exception:
             continue
+        # Test if we can write to this directory
+        if os.access(dir_path, os.W_OK | os.X_OK):
+            return dir_path
+    
+    # Fallback to temp directory
+    resumes_dir = Path(tempfile.gettempdir()) / "resumes"
+    resumes_dir.mkdir(exist_ok=True)
+    return resumes_dir
+
+def file_suffix():
+    """Unique, sortable filename suffix (nanosecond timestamp in hex)"""
+    return format(time.time_ns(), 'x')
+
+def save_resume_file(uploaded_file):
+    """Save the uploaded resume file to local storage"""
     
-    if not resumes_dir:
-        # Fallback to temp directory
-        resumes_dir = Path(tempfile.gettempdir()) / "resumes"
-        resumes_dir.mkdir(exist_ok=True)
+    resumes_dir = get_resumes_dir()
     
     # Generate filename with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = file_suffix()
     file_extension = Path(uploaded_file.name).suffix
     base_name = Path(uploaded_file.name).stem
     resume_filename = resumes_dir / f"{base_name}_{timestamp}{file_extension}"
     
     try:
-        # Save the file
+        # Save the file in 1 MiB chunks rather than via a full getvalue() copy
+        uploaded_file.seek(0)
         with open(resume_filename, 'wb') as f:
-            f.write(uploaded_file.getvalue())
+            shutil.copyfileobj(uploaded_file, f, length=1024 * 1024)
         
         st.info(f"📄 Resume saved to: {resume_filename}")
         return resume_filename
@@ -1025,21 +1244,44 @@ def save_resume_file(uploaded_file):
         st.warning(f"Could not save resume file: {e}")
         return None
 
-def save_results_to_file(data, original_filename):
-    """Save analysis results to a JSON file"""
+def results_to_json(data):
+    """Serialize analysis results to indented JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            data,
+            default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(data, indent=2, ensure_ascii=False, default=str).encode('utf-8')
+
+def compact_json(data):
+    """Serialize analysis data to a compact JSON string for storage"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            data,
+            default=str,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        ).decode('utf-8')
+    return json.dumps(data, ensure_ascii=False, default=str)
+
+def parse_json(text):
+    """Parse stored JSON (orjson's decode errors subclass json.JSONDecodeError)"""
+    return orjson.loads(text) if ORJSON_AVAILABLE else json.loads(text)
+
+def save_results_to_file(results_json, original_filename):
+    """Save serialized analysis results (see results_to_json) to a JSON file"""
     
     # Create results directory if it doesn't exist
     results_dir = Path("results")
     results_dir.mkdir(exist_ok=True)
     
     # Generate filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = file_suffix()
     base_name = Path(original_filename).stem
     result_filename = results_dir / f"{base_name}_analysis_{timestamp}.json"
     
     # Save data
-    with open(result_filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+    result_filename.write_bytes(results_json)
     
     return result_filename
 
@@ -1,7 +1,8 @@
-from typing import Optional
+from typing import FrozenSet, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 import os
+from functools import lru_cache
 from pathlib import Path
 
 class Settings(BaseSettings):
@@ -26,7 +27,7 @@ class Settings(BaseSettings):
     # File Upload Configuration
     upload_dir: Path = Path("data/uploads")
     max_file_size: int = 10 * 1024 * 1024  # 10MB
-    allowed_file_types: list = [".pdf", ".docx", ".doc"]
+    allowed_file_types: FrozenSet[str] = Field(default_factory=lambda: frozenset({".pdf", ".docx", ".doc"}))
     
     # Reddit API Configuration (for later)
     reddit_client_id: Optional[str] = Field(default=None, env="REDDIT_CLIENT_ID")
@@ -48,20 +49,23 @@ class Settings(BaseSettings):
     model_config = {
     "env_file": ".env",
     "case_sensitive": False,
-    "extra": "ignore"  # This will ignore extra env vars
+    "extra": "ignore",  # This will ignore extra env vars
+    "frozen": True  # Shared via get_settings(), so never mutated after load
 }
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        # Create upload directory if it doesn't exist
-        self.upload_dir.mkdir(parents=True, exist_ok=True)
-
-# Global settings instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Shared settings instance, loaded (and the upload directory created) on first use"""
+    settings = Settings()
+    # Create upload directory if it doesn't exist
+    settings.upload_dir.mkdir(parents=True, exist_ok=True)
+    return settings
 
 # Validate critical settings on startup
 def validate_settings():
     """Validate critical configuration on startup"""
+    settings = get_settings()
+    
     if not settings.neo4j_uri:
         raise ValueError("Neo4j URI must be configured")
     
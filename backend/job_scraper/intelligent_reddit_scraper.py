@@ -1,13 +1,34 @@
 # backend/reddit_service/intelligent_reddit_scraper.py
 import praw
+import asyncio
 import logging
-from typing import List, Dict, Optional, Set
+import hashlib
+import heapq
+import math
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Set, Tuple
 from datetime import datetime, timedelta
 import re
+import numpy as np
 from pathlib import Path
 import os
 from dotenv import load_dotenv
 
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 # Import our semantic matcher
 try:
     from ..nlp_service.semantic_job_matcher import SemanticJobMatcher
@@ -25,16 +46,212 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Subreddits fetched at once; each fetch uses its own Reddit client
+SUBREDDIT_FETCH_WORKERS = 4
+
+# Semantic scoring only sees this many candidates per requested job from each
+# subreddit; the rest are dropped by the cheaper keyword overlap first
+PREFILTER_FACTOR = 1.5
+
+# Embeddings of search contexts and posts, shared by every scraper in the process.
+# Posts are keyed by model name and Reddit id; with REDIS_URL set they are also shared across
+# processes for as long as the scraper looks at a post (30 days). Vectors are
+# kept in float16, which is plenty for ranking against a 0.25 threshold
+EMBEDDING_CACHE_SIZE = 4096
+EMBEDDING_CACHE_TTL = 30 * 24 * 3600
+EMBEDDING_DTYPE = np.float16
+EMBEDDING_KEY_PREFIX = "emb:f16:"
+_embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+
+# Extracted job info by Reddit post id (None for posts that are not job posts),
+# so posts seen again on a later scrape skip the filter and extractors
+POST_CACHE_SIZE = 4096
+_post_cache: "OrderedDict[str, Optional[Dict]]" = OrderedDict()
+_post_cache_lock = threading.Lock()
+
+# Keyword tables for the job info extractors, in priority order where it matters
+_EXPERIENCE_LEVELS = (
+    ('senior', (
+        'senior', 'principal', 'staff', 'lead', 'manager', 'director',
+        '5+ years', '7+ years', '10+ years', 'expert', 'architect'
+    )),
+    ('mid', (
+        'mid level', 'mid-level', 'experienced', '2-5 years', '3-7 years',
+        'intermediate', 'associate', 'ii', 'level 2'
+    )),
+    ('entry', (
+        'entry level', 'entry-level', 'junior', 'intern', 'internship',
+        'new grad', 'new graduate', 'fresh graduate', 'recent graduate',
+        '0-1 year', '0-2 years', 'no experience', 'student'
+    ))
+)
+
+_LOCATIONS = (
+    # Major US cities
+    ('new york', 'nyc', 'ny', 'manhattan'), ('san francisco', 'sf', 'bay area'),
+    ('los angeles', 'la', 'california', 'ca'), ('chicago', 'chi', 'illinois', 'il'),
+    ('seattle', 'washington', 'wa'), ('boston', 'massachusetts', 'ma'),
+    ('austin', 'texas', 'tx'), ('denver', 'colorado', 'co'),
+    
+    # Countries
+    ('usa', 'united states', 'america'), ('canada', 'toronto', 'vancouver', 'montreal'),
+    ('uk', 'united kingdom', 'london', 'england'), ('germany', 'berlin', 'munich'),
+    ('australia', 'sydney', 'melbourne'), ('india', 'bangalore', 'mumbai', 'delhi'),
+    
+    # Remote indicators
+    ('remote', 'anywhere', 'distributed', 'work from home', 'wfh'),
+    ('global', 'worldwide', 'international')
+)
+
+# Display form of each location, built once instead of title-casing per post
+_LOCATION_TITLES = {name: name.title() for names in _LOCATIONS for name in names}
+
+_REMOTE_KEYWORDS = (
+    'remote', 'distributed', 'anywhere', 'wfh', 'work from home',
+    'virtual', 'online', 'telecommute', 'home office', 'location independent'
+)
+
+# Comprehensive skill database
+_SKILLS = frozenset({
+    # Programming languages
+    'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'go', 'rust',
+    'php', 'ruby', 'swift', 'kotlin', 'scala', 'r', 'matlab',
+    
+    # Web technologies
+    'react', 'angular', 'vue', 'node.js', 'html', 'css', 'bootstrap',
+    'jquery', 'webpack', 'babel',
+    
+    # Data & ML
+    'sql', 'nosql', 'pandas', 'numpy', 'tensorflow', 'pytorch', 'keras',
+    'scikit-learn', 'machine learning', 'deep learning', 'ai', 'nlp',
+    'computer vision', 'data science', 'statistics', 'tableau', 'powerbi',
+    
+    # Databases
+    'postgresql', 'mysql', 'mongodb', 'redis', 'elasticsearch', 'neo4j',
+    'cassandra', 'dynamodb',
+    
+    # Cloud & DevOps
+    'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'jenkins', 'git',
+    'terraform', 'ansible', 'linux', 'bash',
+    
+    # Frameworks
+    'django', 'flask', 'fastapi', 'spring', 'express', 'rails',
+    'streamlit', 'gradio',
+    
+    # Other tools
+    'excel', 'jira', 'confluence', 'slack', 'figma', 'adobe'
+})
+
+# Single-word skills are matched against the post's tokens (so 'r' no longer
+# matches inside 'are'); only the multi-word ones need a substring scan
+_SKILLS_SINGLE = frozenset(skill for skill in _SKILLS if ' ' not in skill)
+_SKILLS_MULTI = tuple(sorted(skill for skill in _SKILLS if ' ' in skill))
+_SKILL_TOKEN_RE = re.compile(r'[a-z0-9+#](?:[a-z0-9.+#-]*[a-z0-9+#])?')
+
+_JOB_TYPES = (
+    ('internship', ('intern', 'internship')),
+    ('full-time', ('full-time', 'full time', 'permanent')),
+    ('part-time', ('part-time', 'part time')),
+    ('contract', ('contract', 'freelance', 'consultant'))
+)
+
+_COMPANY_TYPES = (
+    ('startup', ('startup', 'early stage', 'seed')),
+    ('enterprise', ('enterprise', 'fortune', 'multinational')),
+    ('agency', ('agency', 'consultancy', 'consulting'))
+)
+
+# Ignored by the keyword relevance fallback
+_STOP_WORDS = frozenset({'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'})
+
+# Extraction patterns, compiled once and tried in order (the first pattern that
+# matches anywhere wins, so they are not merged into one leftmost-match regex)
+_LOCATION_PATTERNS = tuple(
+    re.compile('(' + '|'.join(map(re.escape, names)) + ')', re.IGNORECASE) for names in _LOCATIONS
+)
+
+_SALARY_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in [
+    r'\$(\d+)k?-?\$?(\d+)k?\s*(per|/)?\s*(year|annual|annually)',
+    r'\$(\d+,?\d+)\s*-?\s*\$?(\d+,?\d+)?\s*(per|/)?\s*(year|annual|annually)',
+    r'(\d+)k?\s*-\s*(\d+)k?\s*(usd|dollars?|salary)',
+    r'(\d+)\s*-\s*(\d+)\s*(per hour|/hour|hourly)',
+])
+
+def _build_token_automaton():
+    """Aho-Corasick automaton over every extractor keyword, mapping each to its (category, label, rank) uses"""
+    uses = {}
+    for level, indicators in _EXPERIENCE_LEVELS:
+        for indicator in indicators:
+            uses.setdefault(indicator, []).append(('experience_level', level, 0))
+    for group, names in enumerate(_LOCATIONS):
+        for rank, name in enumerate(names):
+            uses.setdefault(name, []).append(('location', group, rank))
+    for keyword in _REMOTE_KEYWORDS:
+        uses.setdefault(keyword, []).append(('remote', True, 0))
+    for job_type, terms in _JOB_TYPES:
+        for term in terms:
+            uses.setdefault(term, []).append(('job_type', job_type, 0))
+    for company_type, terms in _COMPANY_TYPES:
+        for term in terms:
+            uses.setdefault(term, []).append(('company_type', company_type, 0))
+    
+    automaton = ahocorasick.Automaton()
+    for keyword, keyword_uses in uses.items():
+        automaton.add_word(keyword, (keyword, tuple(keyword_uses)))
+    automaton.make_automaton()
+    return automaton
+
+_TOKEN_AUTOMATON = _build_token_automaton() if AHOCORASICK_AVAILABLE else None
+
+# Job post heuristics
+_JOB_KEYWORDS = (
+    # Direct job terms
+    'hiring', 'job', 'position', 'role', 'opportunity', 'opening',
+    'intern', 'internship', 'graduate', 'entry level',
+    
+    # Action words
+    'looking for', 'seeking', 'need', 'wanted', 'apply',
+    'join our team', 'we are hiring', 'come work',
+    
+    # Job types
+    'developer', 'engineer', 'analyst', 'scientist', 'manager',
+    'designer', 'consultant', 'specialist', 'coordinator',
+    
+    # Work arrangements
+    'remote', 'freelance', 'contract', 'full-time', 'part-time',
+    'work from home', 'flexible', 'startup'
+)
+
+_APPLICATION_INDICATORS = (
+    'apply', 'send resume', 'cv', 'portfolio', 'contact', 'email',
+    'dm me', 'message me', 'interested candidates'
+)
+
+# Salary and title checks, one compiled alternation each instead of a search per pattern
+_POST_SALARY_RE = re.compile(
+    r'\$\d+k?|\$\d+,\d+|\d+k\s*(?:per|/)\s*(?:year|month|hour)'
+    r'|salary|compensation|pay|wage|benefits',
+    re.IGNORECASE
+)
+_POST_TITLE_RE = re.compile(
+    r'\[.*hire.*\]|\[.*hiring.*\]|\[.*job.*\]'
+    r'|hiring:|job:|position:|role:',
+    re.IGNORECASE
+)
+
 class IntelligentRedditJobScraper:
     """Smart Reddit job scraper with real-time semantic filtering"""
     
-    def __init__(self, user_email: str = None, min_relevance_score: float = 0.25):
+    def __init__(self, user_email: str = None, min_relevance_score: float = 0.25, load_profile: bool = True):
         """
         Initialize intelligent scraper
         
         Args:
             user_email: User's email to get profile context
             min_relevance_score: Minimum score to consider a job relevant (0.0-1.0)
+            load_profile: Load the profile now; pass False and await warmup() instead
+                          to keep the Neo4j round trip out of the constructor
         """
         self.user_email = user_email
         self.min_relevance_score = min_relevance_score
@@ -48,39 +265,77 @@ class IntelligentRedditJobScraper:
             raise ValueError("Reddit API credentials not found in environment variables")
         
         try:
-            self.reddit = praw.Reddit(
-                client_id=self.client_id,
-                client_secret=self.client_secret,
-                user_agent=self.user_agent
-            )
+            self.reddit = self._create_reddit()
             logger.info("✅ Reddit API connection successful")
         except Exception as e:
             logger.error(f"❌ Failed to initialize Reddit API: {e}")
             raise
         
+        # PRAW clients are not thread safe, so concurrent subreddit fetches
+        # each borrow an idle client (creating more as needed)
+        self._idle_reddit = queue.SimpleQueue()
+        self._idle_reddit.put(self.reddit)
+        
         # Initialize semantic components
         self.semantic_matcher = SemanticJobMatcher()
         self.resume_storage = ResumeNeo4jStorage()
         
+        # Optional shared embedding cache
+        redis_url = os.getenv('REDIS_URL')
+        self._redis = redis.Redis.from_url(redis_url) if redis_url and REDIS_AVAILABLE else None
+        
         # Cache user profile for efficiency
         self.user_profile = None
         self.user_profile_text = None
+        self._user_level = 'entry'
+        self._user_skills = frozenset()
+        self._user_domains = frozenset()
+        self._context_embedding = None
+        self._context_words = frozenset()
         
-        if user_email:
+        if user_email and load_profile:
             self._load_user_profile()
     
+    def _create_reddit(self) -> praw.Reddit:
+        """New read-only Reddit API client"""
+        return praw.Reddit(
+            client_id=self.client_id,
+            client_secret=self.client_secret,
+            user_agent=self.user_agent
+        )
+    
     def _load_user_profile(self):
         """Load and cache user profile"""
         try:
             self.user_profile = self.resume_storage.get_user_profile(self.user_email)
             if self.user_profile:
                 self.user_profile_text = self.semantic_matcher._profile_to_text(self.user_profile)
+                
+                # Profile facts used by the context bonus of every scored post
+                self._user_level = self.user_profile.get('experience_level', 'entry')
+                self._user_skills = frozenset(skill['skill'].lower() for skill in self.user_profile.get('skills', []))
+                self._user_domains = frozenset(domain['domain'].lower() for domain in self.user_profile.get('domains', []))
                 logger.info(f"✅ Loaded profile for {self.user_email}")
             else:
                 logger.warning(f"❌ No profile found for {self.user_email}")
         except Exception as e:
             logger.error(f"Failed to load user profile: {e}")
     
+    async def warmup(self):
+        """
+        Load the user profile (if not loaded yet) and encode it, off the event loop.
+        The first scrape_intelligent_jobs call then starts with a warm model and,
+        for an empty search query, an already cached context embedding
+        """
+        if self.user_email and not self.user_profile:
+            await asyncio.to_thread(self._load_user_profile)
+        
+        # The matcher loads its model on first access, so keep that off the event loop too
+        has_model = await asyncio.to_thread(lambda: self.semantic_matcher.model is not None)
+        
+        if self.user_profile_text and has_model:
+            await asyncio.to_thread(self._build_search_context, "")
+    
     def set_user_context(self, user_email: str):
         """Change user context for scraping"""
         self.user_email = user_email
@@ -89,7 +344,8 @@ class IntelligentRedditJobScraper:
     def scrape_intelligent_jobs(self, 
                               search_query: str = "", 
                               subreddits: List[str] = None, 
-                              limit_per_subreddit: int = 20) -> List[Dict]:
+                              limit_per_subreddit: int = 20,
+                              top_k: Optional[int] = None) -> List[Dict]:
         """
         Intelligently scrape jobs based on user profile and search query
         
@@ -97,9 +353,10 @@ class IntelligentRedditJobScraper:
             search_query: Natural language search (e.g. "AI healthcare internships")
             subreddits: List of subreddits to search
             limit_per_subreddit: Max posts per subreddit
+            top_k: Only return the k most relevant jobs (all of them if None)
             
         Returns:
-            List of semantically filtered, relevant jobs
+            List of semantically filtered, relevant jobs, most relevant first
         """
         
         if not self.user_profile:
@@ -123,31 +380,78 @@ class IntelligentRedditJobScraper:
         
         all_relevant_jobs = []
         total_posts_scanned = 0
-        
-        for subreddit_name in subreddits:
-            logger.info(f"🔎 Scanning r/{subreddit_name}...")
-            
-            try:
-                subreddit_jobs = self._scrape_subreddit_intelligently(
+        candidates_by_subreddit = {}
+        
+        # Fetch subreddits concurrently; the time is spent waiting on Reddit
+        with ThreadPoolExecutor(max_workers=min(SUBREDDIT_FETCH_WORKERS, len(subreddits))) as executor:
+            futures = {}
+            for subreddit_name in subreddits:
+                logger.info(f"🔎 Scanning r/{subreddit_name}...")
+                futures[subreddit_name] = executor.submit(
+                    self._scrape_subreddit_intelligently,
                     subreddit_name, 
-                    enhanced_search_context,
                     limit_per_subreddit
                 )
-                
-                relevant_count = len(subreddit_jobs)
-                all_relevant_jobs.extend(subreddit_jobs)
-                
-                logger.info(f"   ✅ Found {relevant_count} relevant jobs")
-                
-            except Exception as e:
-                logger.error(f"   ❌ Error scraping r/{subreddit_name}: {e}")
-                continue
+            
+            for subreddit_name, future in futures.items():
+                try:
+                    candidates_by_subreddit[subreddit_name], posts_checked = future.result()
+                    total_posts_scanned += posts_checked
+                    
+                except Exception as e:
+                    logger.error(f"   ❌ Error scraping r/{subreddit_name}: {e}")
+                    continue
+        
+        # Drop cross-posts: the same post id, or the same title, already
+        # collected from an earlier subreddit in the list
+        seen_ids = set()
+        seen_titles = set()
+        for subreddit_name, subreddit_candidates in candidates_by_subreddit.items():
+            unique_candidates = []
+            for job_data, text in subreddit_candidates:
+                title_key = job_data['title'].strip().lower()
+                if job_data['id'] in seen_ids or title_key in seen_titles:
+                    continue
+                seen_ids.add(job_data['id'])
+                seen_titles.add(title_key)
+                unique_candidates.append((job_data, text))
+            candidates_by_subreddit[subreddit_name] = unique_candidates
+        
+        # Keep the encoder to the best keyword matches of each subreddit
+        if self._context_embedding is not None:
+            keep = math.ceil(limit_per_subreddit * PREFILTER_FACTOR)
+            for subreddit_name, subreddit_candidates in candidates_by_subreddit.items():
+                candidates_by_subreddit[subreddit_name] = self._prefilter_candidates(subreddit_candidates, keep)
+        
+        # Score the candidates from every subreddit with one batched encode
+        candidates = [candidate for jobs in candidates_by_subreddit.values() for candidate in jobs]
+        scores = iter(self._score_jobs(candidates))
+        
+        for subreddit_name, subreddit_candidates in candidates_by_subreddit.items():
+            subreddit_jobs = []
+            
+            for (job_data, _), relevance_score in zip(subreddit_candidates, scores):
+                # Only keep if above minimum threshold, up to the per-subreddit limit
+                if relevance_score >= self.min_relevance_score and len(subreddit_jobs) < limit_per_subreddit:
+                    job_data['relevance_score'] = relevance_score
+                    job_data['matched_for_user'] = self.user_email
+                    job_data['search_context'] = enhanced_search_context[:200]  # Store partial context
+                    subreddit_jobs.append(job_data)
+            
+            all_relevant_jobs.extend(subreddit_jobs)
+            logger.info(f"   ✅ r/{subreddit_name}: {len(subreddit_jobs)} relevant jobs")
+        
+        total_relevant = len(all_relevant_jobs)
         
         # Sort by relevance score
-        all_relevant_jobs.sort(key=lambda x: x['relevance_score'], reverse=True)
+        if top_k is not None and top_k < total_relevant:
+            # Partial selection of the top K instead of sorting every job (ties keep scrape order, as sort does)
+            all_relevant_jobs = heapq.nlargest(top_k, all_relevant_jobs, key=lambda x: x['relevance_score'])
+        else:
+            all_relevant_jobs.sort(key=lambda x: x['relevance_score'], reverse=True)
         
         logger.info(f"🎉 Intelligent scraping complete!")
-        logger.info(f"   📊 Total relevant jobs: {len(all_relevant_jobs)}")
+        logger.info(f"   📊 Total relevant jobs: {total_relevant}")
         logger.info(f"   🔍 Posts scanned: {total_posts_scanned}")
         
         if all_relevant_jobs:
@@ -159,26 +463,48 @@ class IntelligentRedditJobScraper:
         """Build enhanced search context from user profile + query"""
         
         if not self.user_profile_text:
-            return search_query
-        
-        if search_query:
-            return f"{self.user_profile_text}. Looking for: {search_query}"
+            context = search_query
+        elif search_query:
+            context = f"{self.user_profile_text}. Looking for: {search_query}"
         else:
-            return self.user_profile_text
+            context = self.user_profile_text
+        
+        # Context words for the keyword fallback, split once per search
+        self._context_words = frozenset(context.lower().split()) - _STOP_WORDS
+        
+        # Encode the context once; every job is compared against this vector
+        self._context_embedding = None
+        if self.semantic_matcher.model:
+            try:
+                context_key = 'context:' + hashlib.sha1(context.encode('utf-8')).hexdigest()
+                self._context_embedding = self._cached_encode([(context_key, context)], str)[0]
+            except Exception as e:
+                logger.error(f"Failed to encode search context: {e}")
+        
+        return context
     
     def _scrape_subreddit_intelligently(self, 
                                        subreddit_name: str, 
-                                       search_context: str,
-                                       limit: int) -> List[Dict]:
-        """Scrape a single subreddit with semantic filtering"""
+                                       limit: int) -> Tuple[List[Tuple[Dict, str]], int]:
+        """
+        Collect likely job posts, with their lowercased text, from a single
+        subreddit for semantic scoring; also returns the number of posts checked
+        """
         
         try:
-            subreddit = self.reddit.subreddit(subreddit_name)
-            relevant_jobs = []
-            posts_checked = 0
+            reddit = self._idle_reddit.get_nowait()
+        except queue.Empty:
+            reddit = self._create_reddit()
+        
+        candidates = []
+        posts_checked = 0
+        
+        try:
+            subreddit = reddit.subreddit(subreddit_name)
             
-            # Get recent posts
-            for post in subreddit.new(limit=limit * 2):  # Check more posts to find relevant ones
+            # Get recent posts. Check more posts to find relevant ones; PRAW pages
+            # up to 100 posts per request, so this is still one request for limit <= 50
+            for post in subreddit.new(limit=limit * 2):
                 posts_checked += 1
                 
                 # Skip old posts (older than 30 days)
@@ -186,103 +512,76 @@ class IntelligentRedditJobScraper:
                 if post_age > timedelta(days=30):
                     continue
                 
-                # Quick pre-filter: Is this likely a job post?
-                if not self._is_likely_job_post(post.title, post.selftext):
-                    continue
+                # Lowercased once and shared by the filter, extractors and scoring
+                text = (post.title + ' ' + post.selftext).lower()
                 
-                # Extract job information
-                job_data = self._extract_job_info(post)
-                if not job_data:
+                with _post_cache_lock:
+                    seen = post.id in _post_cache
+                    if seen:
+                        _post_cache.move_to_end(post.id)
+                        cached_job = _post_cache[post.id]
+                
+                if seen:
+                    if cached_job:
+                        # Copy, since scoring adds per-user fields to the job
+                        candidates.append(({**cached_job, 'scraped_at': datetime.now().isoformat()}, text))
                     continue
                 
-                # Semantic relevance check
-                relevance_score = self._calculate_relevance(job_data, search_context)
+                # Quick pre-filter: Is this likely a job post?
+                job_data = None
+                if self._is_likely_job_post(post.title, text):
+                    # Extract job information
+                    job_data = self._extract_job_info(post, text)
                 
-                # Only keep if above minimum threshold
-                if relevance_score >= self.min_relevance_score:
-                    job_data['relevance_score'] = relevance_score
-                    job_data['matched_for_user'] = self.user_email
-                    job_data['search_context'] = search_context[:200]  # Store partial context
-                    relevant_jobs.append(job_data)
+                with _post_cache_lock:
+                    _post_cache[post.id] = dict(job_data) if job_data else None
+                    if len(_post_cache) > POST_CACHE_SIZE:
+                        _post_cache.popitem(last=False)
                 
-                # Early exit if we have enough good matches
-                if len(relevant_jobs) >= limit:
-                    break
+                if job_data:
+                    candidates.append((job_data, text))
             
-            return relevant_jobs
+            return candidates, posts_checked
             
         except Exception as e:
             logger.error(f"Error scraping r/{subreddit_name}: {e}")
-            return []
-    
-    def _is_likely_job_post(self, title: str, content: str) -> bool:
-        """Quick heuristic to identify potential job posts"""
-        
-        # Enhanced job indicators
-        job_keywords = [
-            # Direct job terms
-            'hiring', 'job', 'position', 'role', 'opportunity', 'opening',
-            'intern', 'internship', 'graduate', 'entry level',
-            
-            # Action words
-            'looking for', 'seeking', 'need', 'wanted', 'apply',
-            'join our team', 'we are hiring', 'come work',
-            
-            # Job types
-            'developer', 'engineer', 'analyst', 'scientist', 'manager',
-            'designer', 'consultant', 'specialist', 'coordinator',
-            
-            # Work arrangements
-            'remote', 'freelance', 'contract', 'full-time', 'part-time',
-            'work from home', 'flexible', 'startup'
-        ]
+            return [], posts_checked
         
-        # Combine title and content
-        text = (title + ' ' + content).lower()
-        
-        # Count job keyword matches
-        job_keyword_count = sum(1 for keyword in job_keywords if keyword in text)
-        
-        # Check for salary/compensation mentions
-        salary_patterns = [
-            r'\$\d+k?', r'\$\d+,\d+', r'\d+k\s*(per|/)\s*(year|month|hour)',
-            r'salary', r'compensation', r'pay', r'wage', r'benefits'
-        ]
-        has_salary = any(re.search(pattern, text, re.IGNORECASE) for pattern in salary_patterns)
+        finally:
+            self._idle_reddit.put(reddit)
+    
+    def _is_likely_job_post(self, title: str, text: str) -> bool:
+        """Quick heuristic to identify potential job posts (text is the lowercased title and body)"""
+        
+        # Title patterns (jobs often have structured titles) are worth 2 points,
+        # enough on their own, and the title is the cheapest text to check
+        if _POST_TITLE_RE.search(title):
+            return True
+        
+        # Count job keyword matches; two are already enough
+        job_keyword_count = 0
+        for keyword in _JOB_KEYWORDS:
+            if keyword in text:
+                job_keyword_count += 1
+                if job_keyword_count >= 2:
+                    return True
         
         # Check for application instructions
-        application_indicators = [
-            'apply', 'send resume', 'cv', 'portfolio', 'contact', 'email',
-            'dm me', 'message me', 'interested candidates'
-        ]
-        has_application_info = any(indicator in text for indicator in application_indicators)
+        has_application_info = any(indicator in text for indicator in _APPLICATION_INDICATORS)
         
         # Scoring: need multiple indicators for higher confidence
-        score = 0
-        if job_keyword_count >= 2:
-            score += 2
-        elif job_keyword_count >= 1:
-            score += 1
-        
-        if has_salary:
-            score += 1
+        score = job_keyword_count + has_application_info
+        if score >= 2:
+            return True
         
-        if has_application_info:
-            score += 1
-        
-        # Title patterns (jobs often have structured titles)
-        title_patterns = [
-            r'\[.*hire.*\]', r'\[.*hiring.*\]', r'\[.*job.*\]',
-            r'hiring:', r'job:', r'position:', r'role:'
-        ]
-        
-        if any(re.search(pattern, title, re.IGNORECASE) for pattern in title_patterns):
-            score += 2
+        # Check for salary/compensation mentions
+        if score == 1 and _POST_SALARY_RE.search(text):
+            return True
         
-        return score >= 2  # Need at least 2 points to be considered a job post
+        return False  # Need at least 2 points to be considered a job post
     
-    def _extract_job_info(self, post) -> Optional[Dict]:
-        """Extract structured job information from Reddit post"""
+    def _extract_job_info(self, post, text: str) -> Optional[Dict]:
+        """Extract structured job information from Reddit post (text is the lowercased title and body)"""
         
         try:
             # Basic post information
@@ -301,16 +600,24 @@ class IntelligentRedditJobScraper:
             }
             
             # Enhanced information extraction
-            text = (post.title + ' ' + post.selftext).lower()
-            
-            # Extract experience level with better logic
-            job_data['experience_level'] = self._extract_experience_level(text)
-            
-            # Extract location with enhanced patterns
-            job_data['location'] = self._extract_location(text)
-            
-            # Enhanced remote work detection
-            job_data['remote'] = self._is_remote_job(text)
+            if _TOKEN_AUTOMATON is not None:
+                # One automaton pass covers every keyword-based field
+                job_data.update(self._scan_tokens(text))
+            else:
+                # Extract experience level with better logic
+                job_data['experience_level'] = self._extract_experience_level(text)
+                
+                # Extract location with enhanced patterns
+                job_data['location'] = self._extract_location(text)
+                
+                # Enhanced remote work detection
+                job_data['remote'] = self._is_remote_job(text)
+                
+                # Extract job type (internship, full-time, etc.)
+                job_data['job_type'] = self._extract_job_type(text)
+                
+                # Extract company size hints
+                job_data['company_type'] = self._extract_company_type(text)
             
             # Enhanced skills extraction
             job_data['skills_mentioned'] = self._extract_skills(text)
@@ -318,219 +625,216 @@ class IntelligentRedditJobScraper:
             # Extract salary information
             job_data['salary_info'] = self._extract_salary(text)
             
-            # Extract job type (internship, full-time, etc.)
-            job_data['job_type'] = self._extract_job_type(text)
-            
-            # Extract company size hints
-            job_data['company_type'] = self._extract_company_type(text)
-            
             return job_data
             
         except Exception as e:
             logger.error(f"Error extracting job info: {e}")
             return None
     
-    def _calculate_relevance(self, job_data: Dict, search_context: str) -> float:
-        """Calculate how relevant this job is to the user's profile and search"""
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts in one batch as unit-length embeddings"""
+        return self.semantic_matcher.model.encode(
+            texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True
+        )
+    
+    def _cached_encode(self, entries: List[Tuple[str, object]], to_text: Callable[[object], str]) -> np.ndarray:
+        """
+        Embeddings for (key, item) pairs, looked up in memory, then Redis;
+        only the misses are converted with to_text and encoded, in one batch
+        """
+        model_name = self.semantic_matcher.model_name
+        if model_name is None:
+            # A model set by hand can't share vectors with the named model's caches
+            return self._encode([to_text(item) for _, item in entries])
+        
+        entries = [(f"{model_name}:{key}", item) for key, item in entries]
+        
+        found = {}
+        with _embedding_cache_lock:
+            for key, _ in entries:
+                vector = _embedding_cache.get(key)
+                if vector is not None:
+                    _embedding_cache.move_to_end(key)
+                    found[key] = vector
+        
+        missing = dict((key, item) for key, item in entries if key not in found)
+        if missing and self._redis is not None:
+            try:
+                stored = self._redis.mget([EMBEDDING_KEY_PREFIX + key for key in missing])
+                for key, raw in zip(list(missing), stored):
+                    if raw is not None:
+                        found[key] = np.frombuffer(raw, dtype=EMBEDDING_DTYPE)
+                        del missing[key]
+            except redis.RedisError as e:
+                logger.warning(f"Embedding cache unavailable: {e}")
+        
+        if missing:
+            vectors = self._encode([to_text(item) for item in missing.values()]).astype(EMBEDDING_DTYPE)
+            new_embeddings = dict(zip(missing, vectors))
+            found.update(new_embeddings)
+            
+            if self._redis is not None:
+                try:
+                    with self._redis.pipeline(transaction=False) as pipe:
+                        for key, vector in new_embeddings.items():
+                            pipe.set(EMBEDDING_KEY_PREFIX + key, vector.tobytes(), ex=EMBEDDING_CACHE_TTL)
+                        pipe.execute()
+                except redis.RedisError as e:
+                    logger.warning(f"Embedding cache unavailable: {e}")
+        
+        with _embedding_cache_lock:
+            for key, vector in found.items():
+                _embedding_cache[key] = vector
+                _embedding_cache.move_to_end(key)
+            while len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+                _embedding_cache.popitem(last=False)
+        
+        return np.stack([found[key] for key, _ in entries])
+    
+    def _prefilter_candidates(self, candidates: List[Tuple[Dict, str]], keep: int) -> List[Tuple[Dict, str]]:
+        """The keep candidates with the most keyword overlap with the search context, in their original order"""
+        
+        if len(candidates) <= keep:
+            return candidates
+        
+        overlap = np.fromiter((self._calculate_keyword_relevance(text) for _, text in candidates),
+                              dtype=np.float64, count=len(candidates))
+        top = np.sort(np.argsort(-overlap, kind='stable')[:keep])
+        return [candidates[i] for i in top]
+    
+    def _score_jobs(self, candidates: List[Tuple[Dict, str]]) -> List[float]:
+        """Calculate how relevant each (job, lowercased text) candidate is to the search context"""
+        
+        if not candidates:
+            return []
         
-        if not self.semantic_matcher.model:
+        if self._context_embedding is None:
             # Fallback to keyword matching
-            return self._calculate_keyword_relevance(job_data, search_context)
+            return [self._calculate_keyword_relevance(text) for _, text in candidates]
         
         try:
-            # Convert job to text representation
-            job_text = self.semantic_matcher._job_to_text(job_data)
-            
-            # Calculate semantic similarity
-            similarity = self.semantic_matcher._calculate_semantic_similarity(search_context, job_text)
-            
-            # Add context-aware bonuses
-            bonus = self._calculate_context_bonus(job_data, self.user_profile)
-            
-            return min(similarity + bonus, 1.0)  # Cap at 1.0
-            
+            # One encode for all jobs; on unit vectors the dot product is the cosine similarity
+            job_embeddings = self._cached_encode(
+                [(f"post:{job_data['id']}", job_data) for job_data, _ in candidates],
+                self.semantic_matcher._job_to_text
+            )
+            similarities = job_embeddings.astype(np.float32) @ self._context_embedding.astype(np.float32)
         except Exception as e:
             logger.error(f"Error calculating relevance: {e}")
-            return 0.0
-    
-    def _calculate_keyword_relevance(self, job_data: Dict, search_context: str) -> float:
-        """Fallback keyword-based relevance calculation"""
-        
-        job_text = f"{job_data['title']} {job_data['content']}"
+            return [0.0] * len(candidates)
         
-        # Simple keyword overlap
-        context_words = set(search_context.lower().split())
-        job_words = set(job_text.lower().split())
+        # Add context-aware bonuses, capped at 1.0
+        scores = similarities.astype(np.float64) + self._calculate_context_bonus(candidates)
+        return np.minimum(scores, 1.0).tolist()
+    
+    def _calculate_keyword_relevance(self, text: str) -> float:
+        """Fallback keyword-based relevance calculation (text is the lowercased job post)"""
         
-        # Remove stop words
-        stop_words = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
-        context_words -= stop_words
-        job_words -= stop_words
+        # Simple keyword overlap with the search context, minus stop words
+        job_words = set(text.split())
+        job_words -= _STOP_WORDS
         
         # Calculate overlap
-        intersection = len(context_words & job_words)
-        union = len(context_words | job_words)
+        intersection = len(self._context_words & job_words)
+        union = len(self._context_words) + len(job_words) - intersection
         
         return intersection / union if union > 0 else 0.0
     
-    def _calculate_context_bonus(self, job_data: Dict, user_profile: Dict) -> float:
-        """Calculate bonus score based on job-profile alignment"""
+    def _calculate_context_bonus(self, candidates: List[Tuple[Dict, str]]) -> np.ndarray:
+        """Calculate bonus scores based on job-profile alignment, for every (job, lowercased text) candidate at once"""
         
-        bonus = 0.0
+        count = len(candidates)
+        jobs = [job_data for job_data, _ in candidates]
         
-        # Experience level alignment
-        user_level = user_profile.get('experience_level', 'entry')
-        job_level = job_data.get('experience_level', 'entry')
-        
-        if user_level == job_level:
-            bonus += 0.05  # Small bonus for experience match
+        # Experience level alignment: small bonus for experience match
+        level_match = np.fromiter((job_data.get('experience_level', 'entry') == self._user_level for job_data in jobs),
+                                  dtype=bool, count=count)
+        bonus = np.where(level_match, 0.05, 0.0)
         
         # Remote work preference (assume students prefer remote)
-        if job_data.get('remote', False) and user_level == 'entry':
-            bonus += 0.03
-        
-        # Skills alignment
-        user_skills = {skill['skill'].lower() for skill in user_profile.get('skills', [])}
-        job_skills = {skill.lower() for skill in job_data.get('skills_mentioned', [])}
-        
-        skill_overlap = len(user_skills & job_skills)
-        if skill_overlap > 0:
-            bonus += min(skill_overlap * 0.05, 0.15)  # Up to 0.15 bonus
-        
-        # Domain expertise alignment
-        user_domains = {domain['domain'].lower() for domain in user_profile.get('domains', [])}
-        job_text = (job_data['title'] + ' ' + job_data['content']).lower()
-        
-        domain_matches = sum(1 for domain in user_domains if domain in job_text)
-        if domain_matches > 0:
-            bonus += min(domain_matches * 0.08, 0.16)  # Up to 0.16 bonus
-        
-        return min(bonus, 0.3)  # Cap total bonus at 0.3
+        if self._user_level == 'entry':
+            remote = np.fromiter((bool(job_data.get('remote', False)) for job_data in jobs), dtype=bool, count=count)
+            bonus += np.where(remote, 0.03, 0.0)
+        
+        # Skills alignment, up to 0.15 bonus (extracted skills are already lowercase)
+        skill_overlap = np.fromiter((len(self._user_skills.intersection(job_data.get('skills_mentioned', ()))) for job_data in jobs),
+                                    dtype=np.int64, count=count)
+        bonus += np.minimum(skill_overlap * 0.05, 0.15)
+        
+        # Domain expertise alignment, up to 0.16 bonus
+        if self._user_domains:
+            domain_matches = np.fromiter((sum(domain in text for domain in self._user_domains) for _, text in candidates),
+                                         dtype=np.int64, count=count)
+            bonus += np.minimum(domain_matches * 0.08, 0.16)
+        
+        return np.minimum(bonus, 0.3)  # Cap total bonus at 0.3
+    
+    def _scan_tokens(self, text: str) -> Dict:
+        """Keyword-based job fields (all but skills) from a single automaton pass, matching the _extract_* methods"""
+        
+        found = {'experience_level': set(), 'remote': set(), 'job_type': set(), 'company_type': set()}
+        location = None
+        
+        # Leftmost end of each distinct keyword (matches come out in end order)
+        first_end = {value: end for end, value in reversed(list(_TOKEN_AUTOMATON.iter(text)))}
+        
+        for (keyword, keyword_uses), end in first_end.items():
+            for category, label, rank in keyword_uses:
+                if category == 'location':
+                    # First location group in order, then its leftmost match
+                    candidate = (label, end - len(keyword) + 1, rank, keyword)
+                    if location is None or candidate < location:
+                        location = candidate
+                else:
+                    found[category].add(label)
+        
+        return {
+            'experience_level': next((level for level, _ in _EXPERIENCE_LEVELS if level in found['experience_level']), 'entry'),
+            'location': _LOCATION_TITLES[location[3]] if location else 'Not specified',
+            'remote': bool(found['remote']),
+            'job_type': next((job_type for job_type, _ in _JOB_TYPES if job_type in found['job_type']), 'not-specified'),
+            'company_type': next((company_type for company_type, _ in _COMPANY_TYPES if company_type in found['company_type']), 'not-specified')
+        }
     
     def _extract_experience_level(self, text: str) -> str:
         """Enhanced experience level extraction"""
         
-        entry_indicators = [
-            'entry level', 'entry-level', 'junior', 'intern', 'internship',
-            'new grad', 'new graduate', 'fresh graduate', 'recent graduate',
-            '0-1 year', '0-2 years', 'no experience', 'student'
-        ]
-        
-        mid_indicators = [
-            'mid level', 'mid-level', 'experienced', '2-5 years', '3-7 years',
-            'intermediate', 'associate', 'ii', 'level 2'
-        ]
-        
-        senior_indicators = [
-            'senior', 'principal', 'staff', 'lead', 'manager', 'director',
-            '5+ years', '7+ years', '10+ years', 'expert', 'architect'
-        ]
-        
         # Check in order of specificity
-        for indicator in senior_indicators:
-            if indicator in text:
-                return 'senior'
-        
-        for indicator in mid_indicators:
-            if indicator in text:
-                return 'mid'
-        
-        for indicator in entry_indicators:
-            if indicator in text:
-                return 'entry'
+        for level, indicators in _EXPERIENCE_LEVELS:
+            if any(indicator in text for indicator in indicators):
+                return level
         
         return 'entry'  # Default assumption
     
     def _extract_location(self, text: str) -> str:
         """Enhanced location extraction"""
         
-        location_patterns = [
-            # Major US cities
-            r'(new york|nyc|ny|manhattan)', r'(san francisco|sf|bay area)',
-            r'(los angeles|la|california|ca)', r'(chicago|chi|illinois|il)',
-            r'(seattle|washington|wa)', r'(boston|massachusetts|ma)',
-            r'(austin|texas|tx)', r'(denver|colorado|co)',
-            
-            # Countries
-            r'(usa|united states|america)', r'(canada|toronto|vancouver|montreal)',
-            r'(uk|united kingdom|london|england)', r'(germany|berlin|munich)',
-            r'(australia|sydney|melbourne)', r'(india|bangalore|mumbai|delhi)',
-            
-            # Remote indicators
-            r'(remote|anywhere|distributed|work from home|wfh)',
-            r'(global|worldwide|international)'
-        ]
-        
-        for pattern in location_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _LOCATION_PATTERNS:
+            match = pattern.search(text)
             if match:
-                return match.group(1).title()
+                location = match.group(1)
+                return _LOCATION_TITLES.get(location) or location.title()
         
         return 'Not specified'
     
     def _is_remote_job(self, text: str) -> bool:
         """Enhanced remote work detection"""
         
-        remote_keywords = [
-            'remote', 'distributed', 'anywhere', 'wfh', 'work from home',
-            'virtual', 'online', 'telecommute', 'home office', 'location independent'
-        ]
-        
-        return any(keyword in text for keyword in remote_keywords)
+        return any(keyword in text for keyword in _REMOTE_KEYWORDS)
     
     def _extract_skills(self, text: str) -> List[str]:
         """Enhanced technical skills extraction"""
         
-        # Comprehensive skill database
-        skills = {
-            # Programming languages
-            'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'go', 'rust',
-            'php', 'ruby', 'swift', 'kotlin', 'scala', 'r', 'matlab',
-            
-            # Web technologies
-            'react', 'angular', 'vue', 'node.js', 'html', 'css', 'bootstrap',
-            'jquery', 'webpack', 'babel',
-            
-            # Data & ML
-            'sql', 'nosql', 'pandas', 'numpy', 'tensorflow', 'pytorch', 'keras',
-            'scikit-learn', 'machine learning', 'deep learning', 'ai', 'nlp',
-            'computer vision', 'data science', 'statistics', 'tableau', 'powerbi',
-            
-            # Databases
-            'postgresql', 'mysql', 'mongodb', 'redis', 'elasticsearch', 'neo4j',
-            'cassandra', 'dynamodb',
-            
-            # Cloud & DevOps
-            'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'jenkins', 'git',
-            'terraform', 'ansible', 'linux', 'bash',
-            
-            # Frameworks
-            'django', 'flask', 'fastapi', 'spring', 'express', 'rails',
-            'streamlit', 'gradio',
-            
-            # Other tools
-            'excel', 'jira', 'confluence', 'slack', 'figma', 'adobe'
-        }
-        
-        found_skills = []
-        for skill in skills:
-            if skill in text:
-                found_skills.append(skill)
+        found_skills = list(_SKILLS_SINGLE.intersection(_SKILL_TOKEN_RE.findall(text)))
+        found_skills += [skill for skill in _SKILLS_MULTI if skill in text]
         
         return found_skills
     
     def _extract_salary(self, text: str) -> Optional[str]:
         """Enhanced salary extraction"""
         
-        salary_patterns = [
-            r'\$(\d+)k?-?\$?(\d+)k?\s*(per|/)?\s*(year|annual|annually)',
-            r'\$(\d+,?\d+)\s*-?\s*\$?(\d+,?\d+)?\s*(per|/)?\s*(year|annual|annually)',
-            r'(\d+)k?\s*-\s*(\d+)k?\s*(usd|dollars?|salary)',
-            r'(\d+)\s*-\s*(\d+)\s*(per hour|/hour|hourly)',
-        ]
-        
-        for pattern in salary_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _SALARY_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group(0)
         
@@ -539,28 +843,20 @@ class IntelligentRedditJobScraper:
     def _extract_job_type(self, text: str) -> str:
         """Extract job type (internship, full-time, etc.)"""
         
-        if any(term in text for term in ['intern', 'internship']):
-            return 'internship'
-        elif any(term in text for term in ['full-time', 'full time', 'permanent']):
-            return 'full-time'
-        elif any(term in text for term in ['part-time', 'part time']):
-            return 'part-time'
-        elif any(term in text for term in ['contract', 'freelance', 'consultant']):
-            return 'contract'
-        else:
-            return 'not-specified'
+        for job_type, terms in _JOB_TYPES:
+            if any(term in text for term in terms):
+                return job_type
+        
+        return 'not-specified'
     
     def _extract_company_type(self, text: str) -> str:
         """Extract company type/size hints"""
         
-        if any(term in text for term in ['startup', 'early stage', 'seed']):
-            return 'startup'
-        elif any(term in text for term in ['enterprise', 'fortune', 'multinational']):
-            return 'enterprise'
-        elif any(term in text for term in ['agency', 'consultancy', 'consulting']):
-            return 'agency'
-        else:
-            return 'not-specified'
+        for company_type, terms in _COMPANY_TYPES:
+            if any(term in text for term in terms):
+                return company_type
+        
+        return 'not-specified'
 
 # Convenience functions
 def create_intelligent_scraper(user_email: str, min_relevance: float = 0.25) -> IntelligentRedditJobScraper:
@@ -571,11 +867,12 @@ def scrape_jobs_for_user(user_email: str,
                         search_query: str = "",
                         subreddits: List[str] = None,
                         min_relevance: float = 0.25,
-                        limit_per_subreddit: int = 20) -> List[Dict]:
+                        limit_per_subreddit: int = 20,
+                        top_k: Optional[int] = None) -> List[Dict]:
     """Convenience function to scrape jobs for a user"""
     
     scraper = IntelligentRedditJobScraper(user_email, min_relevance)
-    return scraper.scrape_intelligent_jobs(search_query, subreddits, limit_per_subreddit)
+    return scraper.scrape_intelligent_jobs(search_query, subreddits, limit_per_subreddit, top_k)
 
 if __name__ == "__main__":
     # Test the intelligent scraper
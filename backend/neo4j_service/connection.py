@@ -1,10 +1,10 @@
-from neo4j import GraphDatabase
+from neo4j import GraphDatabase, AsyncGraphDatabase, WRITE_ACCESS
 from neo4j.exceptions import ServiceUnavailable, AuthError
 from typing import Optional
 import logging
-from contextlib import contextmanager
+from contextlib import contextmanager, asynccontextmanager
 
-from backend.app.core.config import settings
+from backend.app.core.config import get_settings
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -15,20 +15,25 @@ class Neo4jConnection:
     
     def __init__(self):
         self.driver: Optional[GraphDatabase.driver] = None
+        self.async_driver: Optional[AsyncGraphDatabase.driver] = None
+        settings = get_settings()
         self.uri = settings.neo4j_uri
         self.user = settings.neo4j_user
         self.password = settings.neo4j_password
         self.database = settings.neo4j_database
         
     def connect(self):
-        """Establish connection to Neo4j database"""
+        """Establish connection to Neo4j database (reuses the pooled driver once connected)"""
+        if self.driver:
+            return True
+        
         try:
             self.driver = GraphDatabase.driver(
                 self.uri,
                 auth=(self.user, self.password),
                 max_connection_lifetime=30 * 60,  # 30 minutes
                 max_connection_pool_size=50,
-                connection_acquisition_timeout=60  # 60 seconds
+                connection_acquisition_timeout=30  # 30 seconds
             )
             
             # Test the connection
@@ -41,22 +46,56 @@ class Neo4jConnection:
                     
         except AuthError as e:
             logger.error(f"❌ Authentication failed: {e}")
+            self.close()
             raise
         except ServiceUnavailable as e:
             logger.error(f"❌ Neo4j service unavailable: {e}")
+            self.close()
             raise
         except Exception as e:
             logger.error(f"❌ Failed to connect to Neo4j: {e}")
+            self.close()
             raise
             
+        self.close()
         return False
     
+    async def connect_async(self):
+        """Create the async driver (pooled connections for the API write path)"""
+        if self.async_driver:
+            return True
+        
+        try:
+            self.async_driver = AsyncGraphDatabase.driver(
+                self.uri,
+                auth=(self.user, self.password),
+                max_connection_lifetime=30 * 60,  # 30 minutes
+                max_connection_pool_size=50,
+                connection_acquisition_timeout=30  # 30 seconds
+            )
+            await self.async_driver.verify_connectivity()
+            logger.info(f"✅ Async driver connected to Neo4j at {self.uri}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to create async Neo4j driver: {e}")
+            self.async_driver = None
+            raise
+    
     def close(self):
         """Close the Neo4j connection"""
         if self.driver:
             self.driver.close()
+            self.driver = None
             logger.info("Neo4j connection closed")
     
+    async def close_async(self):
+        """Close the async Neo4j driver"""
+        if self.async_driver:
+            await self.async_driver.close()
+            self.async_driver = None
+            logger.info("Async Neo4j connection closed")
+    
     @contextmanager
     def get_session(self):
         """Context manager for Neo4j sessions"""
@@ -69,6 +108,18 @@ class Neo4jConnection:
         finally:
             session.close()
     
+    @asynccontextmanager
+    async def get_async_session(self):
+        """Async context manager for write sessions on the async driver"""
+        if not self.async_driver:
+            raise Exception("Async Neo4j driver not initialized. Call connect_async() first.")
+        
+        session = self.async_driver.session(database=self.database, default_access_mode=WRITE_ACCESS)
+        try:
+            yield session
+        finally:
+            await session.close()
+    
     def verify_connectivity(self):
         """Verify that the connection is working"""
         try:
@@ -94,6 +145,9 @@ class Neo4jConnection:
             "CREATE CONSTRAINT user_id_unique IF NOT EXISTS FOR (u:User) REQUIRE u.id IS UNIQUE",
             "CREATE CONSTRAINT user_email_unique IF NOT EXISTS FOR (u:User) REQUIRE u.email IS UNIQUE",
             
+            # Analysis constraints (saved analyses are fetched and deleted by id)
+            "CREATE CONSTRAINT analysis_id_unique IF NOT EXISTS FOR (a:Analysis) REQUIRE a.id IS UNIQUE",
+            
             # Skill constraints
             "CREATE CONSTRAINT skill_name_unique IF NOT EXISTS FOR (s:Skill) REQUIRE s.name IS UNIQUE",
             
@@ -107,12 +161,22 @@ class Neo4jConnection:
         indexes = [
             # Performance indexes
             "CREATE INDEX user_created_at IF NOT EXISTS FOR (u:User) ON (u.created_at)",
+            "CREATE INDEX analysis_created_at IF NOT EXISTS FOR (a:Analysis) ON (a.created_at)",
             "CREATE INDEX job_posted_date IF NOT EXISTS FOR (j:Job) ON (j.posted_date)",
             "CREATE INDEX skill_category IF NOT EXISTS FOR (s:Skill) ON (s.category)",
+            
+            # Looked up by name when a resume's skills and domains are merged
+            "CREATE INDEX soft_skill_name IF NOT EXISTS FOR (s:SoftSkill) ON (s.name)",
+            "CREATE INDEX domain_name IF NOT EXISTS FOR (d:Domain) ON (d.name)",
         ]
         
         try:
             with self.get_session() as session:
+                # Skip schema statements whose constraint/index already exists
+                existing = self._existing_schema_names(session)
+                constraints = [c for c in constraints if c.split()[2] not in existing]
+                indexes = [i for i in indexes if i.split()[2] not in existing]
+                
                 for constraint in constraints:
                     try:
                         session.run(constraint)
@@ -129,6 +193,16 @@ class Neo4jConnection:
                         
         except Exception as e:
             logger.error(f"Failed to create constraints/indexes: {e}")
+    
+    def _existing_schema_names(self, session) -> set:
+        """Names of existing constraints and indexes (empty if SHOW isn't supported)"""
+        try:
+            names = {record["name"] for record in session.run("SHOW CONSTRAINTS YIELD name")}
+            names.update(record["name"] for record in session.run("SHOW INDEXES YIELD name"))
+            return names
+        except Exception as e:
+            logger.warning(f"Could not list existing constraints/indexes: {e}")
+            return set()
 
 # Global connection instance
 neo4j_connection = Neo4jConnection()
@@ -139,7 +213,10 @@ def get_neo4j_connection():
 
 # Initialize connection on import
 def init_neo4j():
-    """Initialize Neo4j connection"""
+    """Initialize Neo4j connection (no-op once the driver is up)"""
+    if neo4j_connection.driver:
+        return True
+    
     try:
         neo4j_connection.connect()
         neo4j_connection.verify_connectivity()
@@ -149,6 +226,15 @@ def init_neo4j():
         logger.error(f"Failed to initialize Neo4j: {e}")
         return False
 
+async def init_neo4j_async():
+    """Initialize the async Neo4j driver"""
+    try:
+        await neo4j_connection.connect_async()
+        return True
+    except Exception as e:
+        logger.error(f"Failed to initialize async Neo4j driver: {e}")
+        return False
+
 if __name__ == "__main__":
     # Test the connection
     print("Testing Neo4j connection...")
@@ -1,6 +1,13 @@
 # backend/nlp_service/semantic_job_matcher.py
 import json
 import logging
+import hashlib
+import heapq
+import importlib.util
+import os
+import sqlite3
+import threading
+from functools import cache, lru_cache
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 import numpy as np
@@ -9,12 +16,15 @@ from pathlib import Path
 # For semantic similarity
 try:
     from sentence_transformers import SentenceTransformer
-    from sklearn.metrics.pairwise import cosine_similarity
     SENTENCE_TRANSFORMERS_AVAILABLE = True
 except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
     logging.warning("sentence-transformers not installed. Install with: pip install sentence-transformers")
 
+# Optional ONNX Runtime backend for faster CPU inference (only looked up, so
+# importing this module doesn't load the native library)
+ONNXRUNTIME_AVAILABLE = importlib.util.find_spec("onnxruntime") is not None
+
 # Import our existing modules
 try:
     from ..neo4j_service.resume_storage import ResumeNeo4jStorage
@@ -28,30 +38,183 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Job embeddings persisted across runs, keyed by a hash of the model and job text.
+# Stored as float16, which is plenty for cosine ranking
+EMBEDDING_CACHE_PATH = Path(os.getenv('EMBEDDING_CACHE_PATH', 'data/job_embeddings.sqlite3'))
+EMBEDDING_DTYPE = np.float16
+
+# Only the jobs with the best keyword overlap, this many times top_k, are semantically scored
+SEMANTIC_CANDIDATES_MULT = 4
+
+# Common words ignored by the keyword fallback
+STOP_WORDS = frozenset({'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should'})
+
+# Filler words left out of match explanations
+EXPLANATION_STOP_WORDS = frozenset({'with', 'have', 'been', 'this', 'that', 'they', 'them', 'were', 'will', 'work'})
+
+# Skills that signal a job is relevant to each user domain
+DOMAIN_KEYWORDS = {
+    'healthcare': ['healthcare', 'medical', 'clinical', 'patient', 'hospital'],
+    'ai_ml': ['machine learning', 'ml', 'ai', 'neural', 'deep learning', 'nlp'],
+    'web_dev': ['web', 'frontend', 'backend', 'api', 'javascript', 'react']
+}
+
+# Bonus points when a keyword appears in both the search query and the job
+QUERY_KEYWORDS = {
+    'intern': 0.1,
+    'entry': 0.1,
+    'junior': 0.1,
+    'remote': 0.05,
+    'healthcare': 0.08,
+    'ai': 0.08,
+    'ml': 0.08,
+    'data science': 0.1,
+    'python': 0.05
+}
+
 class SemanticJobMatcher:
     """Match jobs to user profiles using semantic similarity"""
     
     def __init__(self):
         """Initialize the semantic job matcher"""
         
-        # Initialize sentence transformer model
-        if SENTENCE_TRANSFORMERS_AVAILABLE:
-            try:
-                # Use a lightweight, fast model for job matching
-                self.model = SentenceTransformer('all-MiniLM-L6-v2')
-                logger.info("✅ Loaded sentence transformer model")
-            except Exception as e:
-                logger.error(f"Failed to load sentence transformer: {e}")
-                self.model = None
-        else:
-            self.model = None
-            logger.warning("Sentence transformers not available - falling back to keyword matching")
+        # Sentence transformer model, loaded on first use; model_name is None for a model set by hand
+        self.model_name = MODEL_NAME
+        self._model = None
+        self._model_loaded = False
+        self._model_lock = threading.Lock()
         
         # Initialize resume storage
         self.resume_storage = ResumeNeo4jStorage()
         
-        # Cache for user profiles
+        # Cache for user profiles (raw from Neo4j, and as text)
+        self.user_profile_data_cache = {}
         self.user_profile_cache = {}
+        
+        # Persistent job embedding cache, opened with the model (None if it cannot be opened)
+        self.embedding_cache = None
+        self.embedding_cache_lock = threading.Lock()
+        
+        # Profile and search-text embeddings, per instance so they go with the model
+        self._encode_profile = lru_cache(maxsize=256)(self._encode_profile_uncached)
+    
+    @property
+    def model(self) -> Optional['SentenceTransformer']:
+        """Sentence transformer model, loaded on first access (None if unavailable)"""
+        
+        if self._model_loaded:
+            return self._model
+        
+        with self._model_lock:
+            if self._model_loaded:
+                return self._model
+            
+            if SENTENCE_TRANSFORMERS_AVAILABLE:
+                try:
+                    # Use a lightweight, fast model for job matching
+                    self._model = self._load_model()
+                except Exception as e:
+                    logger.error(f"Failed to load sentence transformer: {e}")
+                else:
+                    self.embedding_cache = self._open_embedding_cache()
+                    logger.info(f"✅ Loaded sentence transformer model ({getattr(self._model, 'backend', 'torch')} backend)")
+            else:
+                logger.warning("Sentence transformers not available - falling back to keyword matching")
+            
+            self._model_loaded = True
+        
+        return self._model
+    
+    @model.setter
+    def model(self, model: Optional['SentenceTransformer']):
+        """Use the given model (or None for keyword matching) instead of loading one"""
+        self._model = model
+        self._model_loaded = True
+        self.model_name = None
+        self._encode_profile.cache_clear()  # Cached vectors came from the previous model
+        self.embedding_cache = None  # The on-disk cache is keyed for MODEL_NAME only
+    
+    def _load_model(self) -> 'SentenceTransformer':
+        """Load the encoder, on ONNX Runtime when running on CPU and it is installed"""
+        
+        import torch
+        
+        if torch.cuda.is_available():
+            model = SentenceTransformer(MODEL_NAME)
+            model.half()  # Half precision on GPU; scores are only ranked and thresholded
+            return model
+        
+        if ONNXRUNTIME_AVAILABLE:
+            try:
+                return SentenceTransformer(MODEL_NAME, backend='onnx', model_kwargs={'provider': 'CPUExecutionProvider'})
+            except Exception as e:
+                logger.warning(f"ONNX backend unavailable, using PyTorch: {e}")
+        
+        return SentenceTransformer(MODEL_NAME)
+    
+    def _open_embedding_cache(self) -> Optional[sqlite3.Connection]:
+        """Open (creating if needed) the on-disk job embedding cache"""
+        try:
+            EMBEDDING_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(EMBEDDING_CACHE_PATH, check_same_thread=False)  # Shared across Streamlit threads
+            connection.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)")
+            return connection
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache unavailable: {e}")
+            return None
+    
+    def _encode_cached(self, texts: List[str]) -> np.ndarray:
+        """Unit-length embeddings for texts, encoding only those not in the on-disk cache"""
+        
+        keys = [hashlib.blake2b(f"{MODEL_NAME}\0{text}".encode('utf-8'), digest_size=16).digest() for text in texts]
+        found = {}
+        
+        if self.embedding_cache is not None:
+            try:
+                unique_keys = list(dict.fromkeys(keys))
+                with self.embedding_cache_lock:
+                    for start in range(0, len(unique_keys), 500):  # Stay under SQLite's variable limit
+                        chunk = unique_keys[start:start + 500]
+                        rows = self.embedding_cache.execute(
+                            f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                        ).fetchall()
+                        found.update((key, np.frombuffer(vector, dtype=EMBEDDING_DTYPE)) for key, vector in rows)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache lookup failed: {e}")
+        
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = self.model.encode(
+                list(missing.values()), batch_size=64, convert_to_numpy=True,
+                normalize_embeddings=True, show_progress_bar=False
+            ).astype(EMBEDDING_DTYPE)
+            found.update(zip(missing, vectors))
+            
+            if self.embedding_cache is not None:
+                try:
+                    with self.embedding_cache_lock, self.embedding_cache:
+                        self.embedding_cache.executemany(
+                            "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                            [(key, vector.tobytes()) for key, vector in zip(missing, vectors)]
+                        )
+                except sqlite3.Error as e:
+                    logger.warning(f"Embedding cache update failed: {e}")
+        
+        return np.stack([found[key] for key in keys]).astype(np.float32)
+    
+    def get_user_profile(self, user_email: str) -> Optional[Dict]:
+        """Get user profile from Neo4j, once per user"""
+        
+        if user_email in self.user_profile_data_cache:
+            return self.user_profile_data_cache[user_email]
+        
+        profile = self.resume_storage.get_user_profile(user_email)
+        if profile:
+            self.user_profile_data_cache[user_email] = profile
+        
+        return profile
     
     def get_user_profile_text(self, user_email: str) -> Optional[str]:
         """Convert user profile to searchable text representation"""
@@ -61,7 +224,7 @@ class SemanticJobMatcher:
             return self.user_profile_cache[user_email]
         
         # Get user profile from Neo4j
-        profile = self.resume_storage.get_user_profile(user_email)
+        profile = self.get_user_profile(user_email)
         if not profile:
             logger.warning(f"No profile found for user: {user_email}")
             return None
@@ -134,37 +297,36 @@ class SemanticJobMatcher:
         
         # Calculate similarity scores
         job_matches = []
+        job_texts = [self._job_to_text(job) for job in jobs]
         
-        for job in jobs:
-            # Get job text representation
-            job_text = self._job_to_text(job)
-            
-            # Calculate similarity
-            if self.model:
-                similarity_score = self._calculate_semantic_similarity(user_profile_text, job_text)
-            else:
-                similarity_score = self._calculate_keyword_similarity(user_profile_text, job_text)
-            
+        if self.model:
+            jobs, job_texts = self._shortlist(user_profile_text, jobs, job_texts, top_k)
+            similarity_scores = self._calculate_semantic_similarities(user_profile_text, job_texts)
+        else:
+            similarity_scores = self._calculate_keyword_similarities(user_profile_text, job_texts)
+        
+        profile = self.get_user_profile(user_email)
+        
+        for job, similarity_score in zip(jobs, similarity_scores):
             # Add additional scoring factors
-            bonus_score = self._calculate_bonus_score(user_email, job)
+            bonus_score = self._calculate_bonus_score(profile, job)
             final_score = similarity_score + bonus_score
             
             job_match = {
                 **job,  # Original job data
                 'similarity_score': similarity_score,
                 'bonus_score': bonus_score,
-                'final_score': final_score,
-                'match_explanation': self._explain_match(user_profile_text, job_text, final_score)
+                'final_score': final_score
             }
             
             job_matches.append(job_match)
         
-        # Sort by final score and return top k
-        job_matches.sort(key=lambda x: x['final_score'], reverse=True)
+        # Sort by final score and return top k, explaining only those
+        top_matches = self._top_matches(job_matches, job_texts, user_profile_text, top_k)
         
-        logger.info(f"✅ Matched jobs. Top score: {job_matches[0]['final_score']:.3f}")
+        logger.info(f"✅ Matched jobs. Top score: {top_matches[0]['final_score']:.3f}")
         
-        return job_matches[:top_k]
+        return top_matches
     
     def _job_to_text(self, job: Dict) -> str:
         """Convert job dict to searchable text"""
@@ -182,8 +344,8 @@ class SemanticJobMatcher:
         # Job content
         content = job.get('content', '')
         if content:
-            # Clean and truncate content
-            clean_content = content.replace('\n', ' ').strip()
+            # Clean and truncate content (clipping first so long posts aren't copied whole)
+            clean_content = content[:600].replace('\n', ' ').strip()
             text_parts.append(clean_content[:500])  # First 500 chars
         
         # Experience level
@@ -207,49 +369,69 @@ class SemanticJobMatcher:
         
         return '. '.join(text_parts)
     
-    def _calculate_semantic_similarity(self, profile_text: str, job_text: str) -> float:
-        """Calculate semantic similarity using sentence transformers"""
+    def _calculate_semantic_similarities(self, profile_text: str, job_texts: List[str]) -> List[float]:
+        """Calculate semantic similarity of every job text to the profile text using sentence transformers"""
+        
+        if not job_texts:
+            return []
         
         try:
-            # Generate embeddings
-            profile_embedding = self.model.encode([profile_text])
-            job_embedding = self.model.encode([job_text])
+            # Generate all job embeddings in one batch, as unit vectors
+            profile_embedding = self._encode_profile(profile_text)
+            job_embeddings = self._encode_cached(job_texts)
             
-            # Calculate cosine similarity
-            similarity = cosine_similarity(profile_embedding, job_embedding)[0][0]
+            # Calculate cosine similarity (a dot product on unit vectors)
+            similarities = job_embeddings @ profile_embedding
             
-            return float(similarity)
+            return similarities.tolist()
             
         except Exception as e:
             logger.error(f"Semantic similarity calculation failed: {e}")
-            return 0.0
+            return [0.0] * len(job_texts)
     
-    def _calculate_keyword_similarity(self, profile_text: str, job_text: str) -> float:
-        """Fallback keyword-based similarity"""
+    def _shortlist(self, profile_text: str, jobs: List[Dict], job_texts: List[str],
+                   top_k: int) -> Tuple[List[Dict], List[str]]:
+        """The jobs (and texts) with the most keyword overlap with the profile text, in their original order"""
         
-        # Simple TF-IDF style similarity
-        profile_words = set(profile_text.lower().split())
-        job_words = set(job_text.lower().split())
+        keep = SEMANTIC_CANDIDATES_MULT * top_k
+        if len(jobs) <= keep:
+            return jobs, job_texts
+        
+        coarse_scores = np.array(self._calculate_keyword_similarities(profile_text, job_texts))
+        shortlist = np.sort(np.argsort(-coarse_scores, kind='stable')[:keep])
         
-        # Remove common stop words
-        stop_words = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should'}
+        return [jobs[i] for i in shortlist], [job_texts[i] for i in shortlist]
+    
+    def _encode_profile_uncached(self, profile_text: str) -> np.ndarray:
+        """Unit-length embedding of a profile or search text (use the cached _encode_profile)"""
+        
+        return self.model.encode(
+            [profile_text], convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False
+        )[0].astype(np.float32)
+    
+    def _calculate_keyword_similarities(self, profile_text: str, job_texts: List[str]) -> List[float]:
+        """Fallback keyword-based similarity of every job text to the profile text"""
         
-        profile_words -= stop_words
-        job_words -= stop_words
+        # Simple TF-IDF style similarity; the profile is tokenized once for all jobs
+        profile_words = set(profile_text.lower().split()) - STOP_WORDS
         
-        # Calculate Jaccard similarity
-        intersection = len(profile_words & job_words)
-        union = len(profile_words | job_words)
+        similarities = []
+        for job_text in job_texts:
+            job_words = set(job_text.lower().split()) - STOP_WORDS
+            
+            # Calculate Jaccard similarity
+            intersection = len(profile_words & job_words)
+            union = len(profile_words) + len(job_words) - intersection
+            
+            similarities.append(intersection / union if union > 0 else 0.0)
         
-        return intersection / union if union > 0 else 0.0
+        return similarities
     
-    def _calculate_bonus_score(self, user_email: str, job: Dict) -> float:
+    def _calculate_bonus_score(self, profile: Optional[Dict], job: Dict) -> float:
         """Calculate bonus points based on job characteristics"""
         
         bonus = 0.0
         
-        # Get user profile for bonus calculations
-        profile = self.resume_storage.get_user_profile(user_email)
         if not profile:
             return bonus
         
@@ -275,21 +457,27 @@ class SemanticJobMatcher:
         user_domains = [d['domain'] for d in profile.get('domains', [])]
         job_skills = job.get('skills_mentioned', [])
         
-        # Check for domain-relevant skills
-        domain_keywords = {
-            'healthcare': ['healthcare', 'medical', 'clinical', 'patient', 'hospital'],
-            'ai_ml': ['machine learning', 'ml', 'ai', 'neural', 'deep learning', 'nlp'],
-            'web_dev': ['web', 'frontend', 'backend', 'api', 'javascript', 'react']
-        }
+        job_skills_text = ' '.join(job_skills).lower()
         
+        # Check for domain-relevant skills
         for user_domain in user_domains:
-            domain_skills = domain_keywords.get(user_domain, [])
-            if any(skill in ' '.join(job_skills).lower() for skill in domain_skills):
+            domain_skills = DOMAIN_KEYWORDS.get(user_domain, [])
+            if any(skill in job_skills_text for skill in domain_skills):
                 bonus += 0.08
                 break
         
         return min(bonus, 0.3)  # Cap bonus at 0.3
     
+    def _top_matches(self, job_matches: List[Dict], job_texts: List[str], profile_text: str, top_k: int) -> List[Dict]:
+        """The top_k matches by final score (ties keep input order), each with its match explanation"""
+        
+        top = heapq.nlargest(top_k, range(len(job_matches)), key=lambda i: job_matches[i]['final_score'])
+        
+        for i in top:
+            job_matches[i]['match_explanation'] = self._explain_match(profile_text, job_texts[i], job_matches[i]['final_score'])
+        
+        return [job_matches[i] for i in top]
+    
     def _explain_match(self, profile_text: str, job_text: str, score: float) -> str:
         """Generate explanation for why this job matches"""
         
@@ -311,7 +499,7 @@ class SemanticJobMatcher:
         
         # Filter for meaningful words
         meaningful_words = [word for word in common_words 
-                          if len(word) > 3 and word not in {'with', 'have', 'been', 'this', 'that', 'they', 'them', 'were', 'will', 'work'}]
+                          if len(word) > 3 and word not in EXPLANATION_STOP_WORDS]
         
         if meaningful_words:
             explanations.append(f"Common keywords: {', '.join(list(meaningful_words)[:5])}")
@@ -343,17 +531,21 @@ class SemanticJobMatcher:
         
         # Calculate similarity with each job
         job_matches = []
+        job_texts = [self._job_to_text(job) for job in jobs]
         
-        for job in jobs:
-            job_text = self._job_to_text(job)
-            
-            if self.model:
-                similarity_score = self._calculate_semantic_similarity(enhanced_query, job_text)
-            else:
-                similarity_score = self._calculate_keyword_similarity(enhanced_query, job_text)
-            
+        if self.model:
+            jobs, job_texts = self._shortlist(enhanced_query, jobs, job_texts, top_k)
+            similarity_scores = self._calculate_semantic_similarities(enhanced_query, job_texts)
+        else:
+            similarity_scores = self._calculate_keyword_similarities(enhanced_query, job_texts)
+        
+        # Only keywords in the query can earn a bonus, so find them once
+        query_lower = query.lower()
+        query_keywords = {keyword: points for keyword, points in QUERY_KEYWORDS.items() if keyword in query_lower}
+        
+        for job, job_text, similarity_score in zip(jobs, job_texts, similarity_scores):
             # Add query-specific bonus
-            query_bonus = self._calculate_query_bonus(query, job)
+            query_bonus = self._calculate_query_bonus(query_keywords, job_text)
             final_score = similarity_score + query_bonus
             
             job_match = {
@@ -361,55 +553,46 @@ class SemanticJobMatcher:
                 'similarity_score': similarity_score,
                 'query_bonus': query_bonus,
                 'final_score': final_score,
-                'search_query': query,
-                'match_explanation': self._explain_match(enhanced_query, job_text, final_score)
+                'search_query': query
             }
             
             job_matches.append(job_match)
         
         # Sort and return top results
-        job_matches.sort(key=lambda x: x['final_score'], reverse=True)
+        top_matches = self._top_matches(job_matches, job_texts, enhanced_query, top_k)
         
-        logger.info(f"✅ Search completed. Top score: {job_matches[0]['final_score']:.3f}")
+        logger.info(f"✅ Search completed. Top score: {top_matches[0]['final_score']:.3f}")
         
-        return job_matches[:top_k]
+        return top_matches
     
-    def _calculate_query_bonus(self, query: str, job: Dict) -> float:
-        """Calculate bonus based on specific query terms"""
+    def _calculate_query_bonus(self, query_keywords: Dict[str, float], job_text: str) -> float:
+        """Calculate bonus for the query's keywords (keyword -> points) found in the job text"""
         
         bonus = 0.0
-        query_lower = query.lower()
-        job_text = self._job_to_text(job).lower()
+        if not query_keywords:
+            return bonus
         
-        # Specific keyword bonuses
-        query_keywords = {
-            'intern': 0.1,
-            'entry': 0.1,
-            'junior': 0.1,
-            'remote': 0.05,
-            'healthcare': 0.08,
-            'ai': 0.08,
-            'ml': 0.08,
-            'data science': 0.1,
-            'python': 0.05
-        }
+        job_text = job_text.lower()
         
+        # Specific keyword bonuses
         for keyword, points in query_keywords.items():
-            if keyword in query_lower and keyword in job_text:
+            if keyword in job_text:
                 bonus += points
         
         return min(bonus, 0.25)  # Cap at 0.25
 
-# Global instance
-semantic_matcher = SemanticJobMatcher()
+@cache
+def _get_matcher() -> SemanticJobMatcher:
+    """Shared matcher instance, created on first use rather than at import"""
+    return SemanticJobMatcher()
 
 def match_jobs_for_user(user_email: str, jobs: List[Dict], top_k: int = 10) -> List[Dict]:
     """Convenience function for job matching"""
-    return semantic_matcher.match_jobs_to_user(user_email, jobs, top_k)
+    return _get_matcher().match_jobs_to_user(user_email, jobs, top_k)
 
 def search_jobs_with_query(user_email: str, query: str, jobs: List[Dict], top_k: int = 10) -> List[Dict]:
     """Convenience function for job search with query"""
-    return semantic_matcher.search_jobs_by_query(user_email, query, jobs, top_k)
+    return _get_matcher().search_jobs_by_query(user_email, query, jobs, top_k)
 
 if __name__ == "__main__":
     # Test the semantic matcher
@@ -420,8 +603,14 @@ if __name__ == "__main__":
     test_jobs_file = Path(__file__).parent.parent / 'reddit_scrape_test.json'
     
     if test_jobs_file.exists():
-        with open(test_jobs_file, 'r') as f:
-            test_jobs = json.load(f)
+        try:
+            # Parse postings straight from the file (fastest available backend) instead of reading it whole first
+            import ijson
+            with open(test_jobs_file, 'rb') as f:
+                test_jobs = list(ijson.items(f, 'item', use_float=True))
+        except ImportError:
+            with open(test_jobs_file, 'r') as f:
+                test_jobs = json.load(f)
         
         print(f"📄 Loaded {len(test_jobs)} test jobs")
         
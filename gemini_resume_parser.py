@@ -166,11 +166,12 @@ Return ONLY the JSON, no markdown formatting or additional text.
         # Remove any comments or extra text
         response_text = re.sub(r'//.*?\n', '', response_text)
 
-        # Debug: show the response for troubleshooting
-        print(f"DEBUG: Cleaned response first 500 chars:")
-        print(response_text[:500])
-        print(f"DEBUG: Last 200 chars:")
-        print(response_text[-200:])
+        # Debug: show the response for troubleshooting (set DEBUG_GEMINI=1)
+        if os.getenv("DEBUG_GEMINI"):
+            print(f"DEBUG: Cleaned response first 500 chars:")
+            print(response_text[:500])
+            print(f"DEBUG: Last 200 chars:")
+            print(response_text[-200:])
         
         # Parse JSON
         insights = json.loads(response_text)
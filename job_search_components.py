@@ -11,7 +11,6 @@ Features:
 import time
 import uuid
 import streamlit as st
-import pandas as pd
 from typing import List, Dict, Optional
 from datetime import datetime
 import sys
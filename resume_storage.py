@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
 from datetime import datetime
 
@@ -12,6 +12,27 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Max rows per UNWIND statement when storing a resume's skills, projects, etc.
+UNWIND_BATCH_SIZE = 1000
+
+# Create or update many users in one round-trip (one row per resume)
+UPSERT_USERS_QUERY = """
+    UNWIND $rows AS row
+    MERGE (u:User {email: row.email})
+    ON CREATE SET
+        u.id = row.user_id,
+        u.created_at = datetime(row.timestamp)
+    SET u.name = row.name,
+        u.education_level = row.education_level,
+        u.field_of_study = row.field_of_study,
+        u.graduation_year = row.graduation_year,
+        u.experience_level = row.experience_level,
+        u.profile_strength = row.profile_strength,
+        u.salary_estimate = row.salary_estimate,
+        u.updated_at = datetime(row.timestamp)
+    RETURN row.email as email, u.id as id
+"""
+
 class ResumeNeo4jStorage:
     """Store and manage resume data in Neo4j"""
     
@@ -31,26 +52,8 @@ class ResumeNeo4jStorage:
                     # 1. Create or update user
                     user_id = self._create_or_update_user(tx, user_email, resume_insights)
                     
-                    # 2. Store technical skills
-                    self._store_technical_skills(tx, user_id, resume_insights.get('technical_skills', []))
-                    
-                    # 3. Store soft skills
-                    self._store_soft_skills(tx, user_id, resume_insights.get('soft_skills', []))
-                    
-                    # 4. Store projects
-                    self._store_projects(tx, user_id, resume_insights.get('projects', []))
-                    
-                    # 5. Store experience
-                    self._store_experience(tx, user_id, resume_insights.get('experience', []))
-                    
-                    # 6. Store achievements
-                    self._store_achievements(tx, user_id, resume_insights.get('achievements', []))
-                    
-                    # 7. Store domain expertise
-                    self._store_domains(tx, user_id, resume_insights.get('domains', []))
-                    
-                    # 8. Store certifications
-                    self._store_certifications(tx, user_id, resume_insights.get('certifications', []))
+                    # 2-8. Store skills, projects, experience, etc.
+                    self._store_resume_details(tx, user_id, resume_insights)
                     
                     # Commit transaction
                     tx.commit()
@@ -67,6 +70,115 @@ class ResumeNeo4jStorage:
             logger.error(f"Failed to store resume: {e}")
             raise
     
+    def store_resume_batch(self, resumes: List[Tuple[str, Dict]]) -> List[str]:
+        """Store several resume analyses in a single transaction.
+        
+        Users are created/updated with one UNWIND query instead of a
+        round-trip per resume. Returns the user IDs in input order.
+        """
+        
+        if not resumes:
+            return []
+        
+        try:
+            with self.connection.get_session() as session:
+                tx = session.begin_transaction()
+                
+                try:
+                    # 1. Create or update all users at once
+                    rows = [self._user_row(email, insights) for email, insights in resumes]
+                    result = tx.run(UPSERT_USERS_QUERY, {'rows': rows})
+                    user_ids = {record['email']: record['id'] for record in result}
+                    
+                    # 2-8. Store skills, projects, experience, etc. per resume
+                    for user_email, resume_insights in resumes:
+                        self._store_resume_details(tx, user_ids[user_email], resume_insights)
+                    
+                    tx.commit()
+                    
+                    logger.info(f"✅ Successfully stored {len(resumes)} resumes in one batch")
+                    return [user_ids[user_email] for user_email, _ in resumes]
+                    
+                except Exception as e:
+                    tx.rollback()
+                    logger.error(f"Batch transaction failed, rolling back: {e}")
+                    raise
+                    
+        except Exception as e:
+            logger.error(f"Failed to store resume batch: {e}")
+            raise
+    
+    async def store_resume_batch_async(self, resumes: List[Tuple[str, Dict]]) -> List[str]:
+        """Async variant of store_resume_batch using the async Bolt driver"""
+        
+        if not resumes:
+            return []
+        
+        rows = [self._user_row(email, insights) for email, insights in resumes]
+        
+        try:
+            async with self.connection.get_async_session() as session:
+                user_ids = await session.execute_write(self._write_batch_async, rows, resumes)
+            
+            logger.info(f"✅ Successfully stored {len(resumes)} resumes in one batch")
+            return user_ids
+            
+        except Exception as e:
+            logger.error(f"Failed to store resume batch: {e}")
+            raise
+    
+    async def _write_batch_async(self, tx, rows: List[Dict], resumes: List[Tuple[str, Dict]]) -> List[str]:
+        """Transaction function for store_resume_batch_async (may be retried)"""
+        
+        result = await tx.run(UPSERT_USERS_QUERY, {'rows': rows})
+        user_ids = {record['email']: record['id'] async for record in result}
+        
+        for user_email, resume_insights in resumes:
+            for query, params in self._resume_detail_statements(user_ids[user_email], resume_insights):
+                await tx.run(query, params)
+        
+        return [user_ids[user_email] for user_email, _ in resumes]
+    
+    def _store_resume_details(self, tx, user_id: str, resume_insights: Dict):
+        """Store everything hanging off the user node"""
+        
+        for query, params in self._resume_detail_statements(user_id, resume_insights):
+            tx.run(query, params)
+    
+    def _resume_detail_statements(self, user_id: str, resume_insights: Dict) -> Iterator[Tuple[str, Dict]]:
+        """Yield the (query, params) pairs that store a resume's related nodes.
+        
+        Kept driver-agnostic so the sync and async write paths share them.
+        """
+        
+        yield from self._technical_skill_statements(user_id, resume_insights.get('technical_skills', []))
+        yield from self._soft_skill_statements(user_id, resume_insights.get('soft_skills', []))
+        yield from self._project_statements(user_id, resume_insights.get('projects', []))
+        yield from self._experience_statements(user_id, resume_insights.get('experience', []))
+        yield from self._achievement_statements(user_id, resume_insights.get('achievements', []))
+        yield from self._domain_statements(user_id, resume_insights.get('domains', []))
+        yield from self._certification_statements(user_id, resume_insights.get('certifications', []))
+    
+    def _user_row(self, user_email: str, insights: Dict) -> Dict:
+        """Build the UNWIND row for a user create/update"""
+        
+        personal_info = insights.get('personal_info', {})
+        exp_level = insights.get('experience_level', {})
+        summary = insights.get('summary', {})
+        
+        return {
+            'email': user_email,
+            'user_id': self._generate_user_id(),
+            'name': personal_info.get('name', ''),
+            'education_level': personal_info.get('education_level', ''),
+            'field_of_study': personal_info.get('field_of_study', ''),
+            'graduation_year': personal_info.get('graduation_year'),
+            'experience_level': exp_level.get('level', 'entry'),
+            'profile_strength': summary.get('profile_strength', 'medium'),
+            'salary_estimate': summary.get('salary_range_estimate', ''),
+            'timestamp': datetime.now().isoformat()
+        }
+    
     def _create_or_update_user(self, tx, user_email: str, insights: Dict) -> str:
         """Create or update user profile"""
         
@@ -140,302 +252,260 @@ class ResumeNeo4jStorage:
         
         return user_id
     
-    def _store_technical_skills(self, tx, user_id: str, skills: List[Dict]):
-        """Store technical skills with relationships"""
+    def _technical_skill_statements(self, user_id: str, skills: List[Dict]) -> Iterator[Tuple[str, Dict]]:
+        """Statements that store technical skills with relationships"""
         
         # Clear existing skills
-        tx.run("""
+        yield ("""
             MATCH (u:User {id: $user_id})-[r:HAS_SKILL]->(s:Skill)
             DELETE r
         """, {'user_id': user_id})
         
-        # Add new skills
+        rows = []
         for skill_data in skills:
             skill_name = skill_data.get('skill', '').lower().strip()
             if not skill_name:
                 continue
-                
-            # Create or merge skill
-            tx.run("""
-                MERGE (s:Skill {name: $skill_name})
-                ON CREATE SET 
-                    s.id = $skill_id,
-                    s.category = $category,
-                    s.created_at = datetime($created_at)
-                ON MATCH SET
-                    s.category = COALESCE(s.category, $category),
-                    s.updated_at = datetime($updated_at)
-            """, {
+            
+            rows.append({
                 'skill_name': skill_name,
                 'skill_id': self._generate_id(),
                 'category': skill_data.get('category', 'technical'),
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat()
-            })
-            
-            # Create relationship
-            tx.run("""
-                MATCH (u:User {id: $user_id})
-                MATCH (s:Skill {name: $skill_name})
-                CREATE (u)-[r:HAS_SKILL {
-                    proficiency: $proficiency,
-                    confidence: $confidence,
-                    context: $context,
-                    verified: false,
-                    added_at: datetime($added_at)
-                }]->(s)
-            """, {
-                'user_id': user_id,
-                'skill_name': skill_name,
                 'proficiency': skill_data.get('proficiency', 'intermediate'),
                 'confidence': skill_data.get('confidence', 0.7),
-                'context': skill_data.get('context', ''),
-                'added_at': datetime.now().isoformat()
+                'context': skill_data.get('context', '')
             })
+        
+        # Create or merge skills and link them to the user
+        yield from self._unwind_statements("""
+            MATCH (u:User {id: $user_id})
+            UNWIND $rows AS row
+            MERGE (s:Skill {name: row.skill_name})
+            ON CREATE SET 
+                s.id = row.skill_id,
+                s.category = row.category,
+                s.created_at = datetime($timestamp)
+            ON MATCH SET
+                s.category = COALESCE(s.category, row.category),
+                s.updated_at = datetime($timestamp)
+            CREATE (u)-[r:HAS_SKILL {
+                proficiency: row.proficiency,
+                confidence: row.confidence,
+                context: row.context,
+                verified: false,
+                added_at: datetime($timestamp)
+            }]->(s)
+        """, rows, user_id)
     
-    def _store_soft_skills(self, tx, user_id: str, soft_skills: List[Dict]):
-        """Store soft skills"""
+    def _soft_skill_statements(self, user_id: str, soft_skills: List[Dict]) -> Iterator[Tuple[str, Dict]]:
+        """Statements that store soft skills"""
         
+        rows = []
         for skill_data in soft_skills:
             skill_name = skill_data.get('skill', '').lower().strip()
             if not skill_name:
                 continue
-                
-            # Create soft skill
-            tx.run("""
-                MERGE (s:SoftSkill {name: $skill_name})
-                ON CREATE SET 
-                    s.id = $skill_id,
-                    s.created_at = datetime($created_at)
-            """, {
-                'skill_name': skill_name,
-                'skill_id': self._generate_id(),
-                'created_at': datetime.now().isoformat()
-            })
             
-            # Create relationship
-            tx.run("""
-                MATCH (u:User {id: $user_id})
-                MATCH (s:SoftSkill {name: $skill_name})
-                MERGE (u)-[r:HAS_SOFT_SKILL {
-                    evidence: $evidence,
-                    added_at: datetime($added_at)
-                }]->(s)
-            """, {
-                'user_id': user_id,
+            rows.append({
                 'skill_name': skill_name,
-                'evidence': skill_data.get('evidence', ''),
-                'added_at': datetime.now().isoformat()
+                'skill_id': self._generate_id(),
+                'evidence': skill_data.get('evidence', '')
             })
+        
+        # Create soft skills and link them to the user
+        yield from self._unwind_statements("""
+            MATCH (u:User {id: $user_id})
+            UNWIND $rows AS row
+            MERGE (s:SoftSkill {name: row.skill_name})
+            ON CREATE SET 
+                s.id = row.skill_id,
+                s.created_at = datetime($timestamp)
+            MERGE (u)-[r:HAS_SOFT_SKILL {
+                evidence: row.evidence,
+                added_at: datetime($timestamp)
+            }]->(s)
+        """, rows, user_id)
     
-    def _store_projects(self, tx, user_id: str, projects: List[Dict]):
-        """Store project information"""
+    def _project_statements(self, user_id: str, projects: List[Dict]) -> Iterator[Tuple[str, Dict]]:
+        """Statements that store project information"""
         
+        rows = []
         for project_data in projects:
             project_title = project_data.get('title', '').strip()
             if not project_title:
                 continue
-                
-            project_id = self._generate_id()
             
-            # Create project
-            tx.run("""
-                CREATE (p:Project {
-                    id: $project_id,
-                    title: $title,
-                    description: $description,
-                    domain: $domain,
-                    complexity: $complexity,
-                    created_at: datetime($created_at)
-                })
-            """, {
-                'project_id': project_id,
+            technologies = [tech.lower().strip() for tech in project_data.get('technologies', [])]
+            
+            rows.append({
+                'project_id': self._generate_id(),
                 'title': project_title,
                 'description': project_data.get('description', ''),
                 'domain': project_data.get('domain', 'general'),
                 'complexity': project_data.get('complexity', 'intermediate'),
-                'created_at': datetime.now().isoformat()
+                'technologies': [
+                    {'tech_name': tech_name, 'skill_id': self._generate_id()}
+                    for tech_name in technologies if tech_name
+                ]
             })
-            
-            # Link to user
-            tx.run("""
-                MATCH (u:User {id: $user_id})
-                MATCH (p:Project {id: $project_id})
-                CREATE (u)-[:WORKED_ON {
-                    role: 'developer',
-                    added_at: datetime($added_at)
-                }]->(p)
-            """, {
-                'user_id': user_id,
-                'project_id': project_id,
-                'added_at': datetime.now().isoformat()
+        
+        # Create projects, link them to the user, then link their technologies
+        yield from self._unwind_statements("""
+            MATCH (u:User {id: $user_id})
+            UNWIND $rows AS row
+            CREATE (p:Project {
+                id: row.project_id,
+                title: row.title,
+                description: row.description,
+                domain: row.domain,
+                complexity: row.complexity,
+                created_at: datetime($timestamp)
             })
-            
-            # Link technologies to project
-            technologies = project_data.get('technologies', [])
-            for tech in technologies:
-                tech_name = tech.lower().strip()
-                if tech_name:
-                    tx.run("""
-                        MERGE (s:Skill {name: $tech_name})
-                        ON CREATE SET s.id = $skill_id, s.category = 'technical'
-                        WITH s
-                        MATCH (p:Project {id: $project_id})
-                        CREATE (p)-[:USES_TECHNOLOGY]->(s)
-                    """, {
-                        'tech_name': tech_name,
-                        'skill_id': self._generate_id(),
-                        'project_id': project_id
-                    })
+            CREATE (u)-[:WORKED_ON {
+                role: 'developer',
+                added_at: datetime($timestamp)
+            }]->(p)
+            WITH p, row
+            UNWIND row.technologies AS tech
+            MERGE (s:Skill {name: tech.tech_name})
+            ON CREATE SET s.id = tech.skill_id, s.category = 'technical'
+            CREATE (p)-[:USES_TECHNOLOGY]->(s)
+        """, rows, user_id)
     
-    def _store_experience(self, tx, user_id: str, experience: List[Dict]):
-        """Store work experience"""
+    def _experience_statements(self, user_id: str, experience: List[Dict]) -> Iterator[Tuple[str, Dict]]:
+        """Statements that store work experience"""
         
+        rows = []
         for exp_data in experience:
             company = exp_data.get('company', '').strip()
             role = exp_data.get('role', '').strip()
             
             if not company or not role:
                 continue
-                
-            exp_id = self._generate_id()
             
-            # Create experience
-            tx.run("""
-                CREATE (e:Experience {
-                    id: $exp_id,
-                    role: $role,
-                    company: $company,
-                    duration: $duration,
-                    type: $type,
-                    created_at: datetime($created_at)
-                })
-            """, {
-                'exp_id': exp_id,
+            rows.append({
+                'exp_id': self._generate_id(),
                 'role': role,
                 'company': company,
                 'duration': exp_data.get('duration', ''),
-                'type': exp_data.get('type', 'internship'),
-                'created_at': datetime.now().isoformat()
+                'type': exp_data.get('type', 'internship')
             })
-            
-            # Link to user
-            tx.run("""
-                MATCH (u:User {id: $user_id})
-                MATCH (e:Experience {id: $exp_id})
-                CREATE (u)-[:HAS_EXPERIENCE]->(e)
-            """, {
-                'user_id': user_id,
-                'exp_id': exp_id
+        
+        # Create experience and link it to the user
+        yield from self._unwind_statements("""
+            MATCH (u:User {id: $user_id})
+            UNWIND $rows AS row
+            CREATE (e:Experience {
+                id: row.exp_id,
+                role: row.role,
+                company: row.company,
+                duration: row.duration,
+                type: row.type,
+                created_at: datetime($timestamp)
             })
+            CREATE (u)-[:HAS_EXPERIENCE]->(e)
+        """, rows, user_id)
     
-    def _store_achievements(self, tx, user_id: str, achievements: List[Dict]):
-        """Store achievements"""
+    def _achievement_statements(self, user_id: str, achievements: List[Dict]) -> Iterator[Tuple[str, Dict]]:
+        """Statements that store achievements"""
         
+        rows = []
         for achievement_data in achievements:
             title = achievement_data.get('title', '').strip()
             if not title:
                 continue
-                
-            achievement_id = self._generate_id()
             
-            tx.run("""
-                CREATE (a:Achievement {
-                    id: $achievement_id,
-                    title: $title,
-                    description: $description,
-                    impact: $impact,
-                    created_at: datetime($created_at)
-                })
-            """, {
-                'achievement_id': achievement_id,
+            rows.append({
+                'achievement_id': self._generate_id(),
                 'title': title,
                 'description': achievement_data.get('description', ''),
-                'impact': achievement_data.get('impact', 'medium'),
-                'created_at': datetime.now().isoformat()
+                'impact': achievement_data.get('impact', 'medium')
             })
-            
-            # Link to user
-            tx.run("""
-                MATCH (u:User {id: $user_id})
-                MATCH (a:Achievement {id: $achievement_id})
-                CREATE (u)-[:ACHIEVED]->(a)
-            """, {
-                'user_id': user_id,
-                'achievement_id': achievement_id
+        
+        # Create achievements and link them to the user
+        yield from self._unwind_statements("""
+            MATCH (u:User {id: $user_id})
+            UNWIND $rows AS row
+            CREATE (a:Achievement {
+                id: row.achievement_id,
+                title: row.title,
+                description: row.description,
+                impact: row.impact,
+                created_at: datetime($timestamp)
             })
+            CREATE (u)-[:ACHIEVED]->(a)
+        """, rows, user_id)
     
-    def _store_domains(self, tx, user_id: str, domains: List[Dict]):
-        """Store domain expertise"""
+    def _domain_statements(self, user_id: str, domains: List[Dict]) -> Iterator[Tuple[str, Dict]]:
+        """Statements that store domain expertise"""
         
+        rows = []
         for domain_data in domains:
             domain_name = domain_data.get('domain', '').strip()
             if not domain_name:
                 continue
-                
-            # Create domain
-            tx.run("""
-                MERGE (d:Domain {name: $domain_name})
-                ON CREATE SET 
-                    d.id = $domain_id,
-                    d.created_at = datetime($created_at)
-            """, {
-                'domain_name': domain_name,
-                'domain_id': self._generate_id(),
-                'created_at': datetime.now().isoformat()
-            })
             
-            # Create relationship
-            tx.run("""
-                MATCH (u:User {id: $user_id})
-                MATCH (d:Domain {name: $domain_name})
-                MERGE (u)-[r:HAS_EXPERTISE {
-                    confidence: $confidence,
-                    evidence: $evidence,
-                    added_at: datetime($added_at)
-                }]->(d)
-            """, {
-                'user_id': user_id,
+            rows.append({
                 'domain_name': domain_name,
+                'domain_id': self._generate_id(),
                 'confidence': domain_data.get('confidence', 0.7),
-                'evidence': ', '.join(domain_data.get('evidence', [])),
-                'added_at': datetime.now().isoformat()
+                'evidence': ', '.join(domain_data.get('evidence', []))
             })
+        
+        # Create domains and link them to the user
+        yield from self._unwind_statements("""
+            MATCH (u:User {id: $user_id})
+            UNWIND $rows AS row
+            MERGE (d:Domain {name: row.domain_name})
+            ON CREATE SET 
+                d.id = row.domain_id,
+                d.created_at = datetime($timestamp)
+            MERGE (u)-[r:HAS_EXPERTISE {
+                confidence: row.confidence,
+                evidence: row.evidence,
+                added_at: datetime($timestamp)
+            }]->(d)
+        """, rows, user_id)
     
-    def _store_certifications(self, tx, user_id: str, certifications: List[Dict]):
-        """Store certifications"""
+    def _certification_statements(self, user_id: str, certifications: List[Dict]) -> Iterator[Tuple[str, Dict]]:
+        """Statements that store certifications"""
         
+        rows = []
         for cert_data in certifications:
             cert_name = cert_data.get('name', '').strip()
             if not cert_name:
                 continue
-                
-            cert_id = self._generate_id()
             
-            tx.run("""
-                CREATE (c:Certification {
-                    id: $cert_id,
-                    name: $name,
-                    issuer: $issuer,
-                    skills: $skills,
-                    created_at: datetime($created_at)
-                })
-            """, {
-                'cert_id': cert_id,
+            rows.append({
+                'cert_id': self._generate_id(),
                 'name': cert_name,
                 'issuer': cert_data.get('issuer', ''),
-                'skills': ', '.join(cert_data.get('skills', [])),
-                'created_at': datetime.now().isoformat()
+                'skills': ', '.join(cert_data.get('skills', []))
             })
-            
-            # Link to user
-            tx.run("""
-                MATCH (u:User {id: $user_id})
-                MATCH (c:Certification {id: $cert_id})
-                CREATE (u)-[:HAS_CERTIFICATION]->(c)
-            """, {
+        
+        # Create certifications and link them to the user
+        yield from self._unwind_statements("""
+            MATCH (u:User {id: $user_id})
+            UNWIND $rows AS row
+            CREATE (c:Certification {
+                id: row.cert_id,
+                name: row.name,
+                issuer: row.issuer,
+                skills: row.skills,
+                created_at: datetime($timestamp)
+            })
+            CREATE (u)-[:HAS_CERTIFICATION]->(c)
+        """, rows, user_id)
+    
+    def _unwind_statements(self, query: str, rows: List[Dict], user_id: str) -> Iterator[Tuple[str, Dict]]:
+        """Run an UNWIND query over rows, at most UNWIND_BATCH_SIZE rows per statement"""
+        
+        timestamp = datetime.now().isoformat()
+        for start in range(0, len(rows), UNWIND_BATCH_SIZE):
+            yield (query, {
                 'user_id': user_id,
-                'cert_id': cert_id
+                'rows': rows[start:start + UNWIND_BATCH_SIZE],
+                'timestamp': timestamp
             })
     
     def _generate_id(self) -> str:
@@ -505,6 +575,14 @@ def store_resume_in_neo4j(user_email: str, resume_insights: Dict) -> str:
     """Convenience function to store resume"""
     return resume_storage.store_complete_resume(user_email, resume_insights)
 
+def store_resume_batch_in_neo4j(resumes: List[Tuple[str, Dict]]) -> List[str]:
+    """Convenience function to store several resumes in one transaction"""
+    return resume_storage.store_resume_batch(resumes)
+
+async def store_resume_batch_in_neo4j_async(resumes: List[Tuple[str, Dict]]) -> List[str]:
+    """Convenience function to store several resumes with the async driver"""
+    return await resume_storage.store_resume_batch_async(resumes)
+
 if __name__ == "__main__":
     # Test storage with sample data
     from connection import init_neo4j
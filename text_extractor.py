@@ -5,8 +5,9 @@ Text Extractor - Copy for Streamlit App
 
 import os
 import logging
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple, Union
 
 # PDF extraction
 try:
@@ -15,6 +16,13 @@ try:
 except ImportError:
     PDF_AVAILABLE = False
 
+# Faster PDF parser, preferred when installed
+try:
+    import playa
+    PLAYA_AVAILABLE = True
+except ImportError:
+    PLAYA_AVAILABLE = False
+
 # DOCX extraction
 try:
     from docx import Document
@@ -24,6 +32,12 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# A document on disk or an open binary stream (e.g. io.BytesIO of an upload)
+Source = Union[Path, BinaryIO]
+
+# Bump when extraction output changes so cached extractions are invalidated
+EXTRACTOR_VERSION = 2
+
 class DocumentTextExtractor:
     """Extract text from various document formats"""
     
@@ -52,63 +66,144 @@ class DocumentTextExtractor:
             return None, f"Unsupported file type: {extension}"
         
         try:
-            # Get appropriate extraction method
-            extract_method = self.supported_types[extension]
-            text = extract_method(file_path)
-            
-            if not text or not text.strip():
-                return None, "No text content found in document"
-            
-            # Clean up the text
-            cleaned_text = self._clean_text(text)
-            
-            logger.info(f"✅ Successfully extracted {len(cleaned_text)} characters from {file_path.name}")
-            return cleaned_text, None
+            return self.text_from_pages(self.iter_pages(file_path), file_path.name)
             
         except Exception as e:
             error_msg = f"Failed to extract text from {file_path.name}: {str(e)}"
             logger.error(error_msg)
             return None, error_msg
     
-    def _extract_from_pdf(self, file_path: Path) -> str:
+    def extract_text_from_stream(self, fp: BinaryIO, suffix: str, name: str = "document") -> Tuple[Optional[str], Optional[str]]:
+        """
+        Extract text from an open binary stream, without a temp file on disk
+        Returns: (extracted_text, error_message)
+        """
+        extension = suffix.lower()
+        
+        if extension not in self.supported_types:
+            return None, f"Unsupported file type: {extension}"
+        
+        try:
+            return self.text_from_pages(self._iter_source_pages(fp, extension), name)
+            
+        except Exception as e:
+            error_msg = f"Failed to extract text from {name}: {str(e)}"
+            logger.error(error_msg)
+            return None, error_msg
+    
+    def iter_pages(self, file_path: str) -> Iterator[str]:
+        """
+        Yield raw document text one page at a time
+        PDFs are read lazily page by page; other formats yield a single chunk
+        """
+        file_path = Path(file_path)
+        extension = file_path.suffix.lower()
+        
+        if extension not in self.supported_types:
+            raise ValueError(f"Unsupported file type: {extension}")
+        
+        yield from self._iter_source_pages(file_path, extension)
+    
+    def _iter_source_pages(self, source: Source, extension: str) -> Iterator[str]:
+        """Yield page texts from a path or binary stream of the given type"""
+        if extension == '.pdf':
+            yield from self._iter_pdf_pages(source)
+        else:
+            yield self.supported_types[extension](source)
+    
+    def text_from_pages(self, pages: Iterable[str], name: str = "document") -> Tuple[Optional[str], Optional[str]]:
+        """
+        Join and clean page texts produced by iter_pages
+        Returns: (extracted_text, error_message)
+        """
+        text = "\n".join(page for page in pages if page)
+        
+        if not text.strip():
+            return None, "No text content found in document"
+        
+        # Clean up the text
+        cleaned_text = self._clean_text(text)
+        
+        logger.info(f"✅ Successfully extracted {len(cleaned_text)} characters from {name}")
+        return cleaned_text, None
+    
+    @staticmethod
+    def _source_name(source: Source) -> str:
+        """Display name of a path or stream for log messages"""
+        if isinstance(source, Path):
+            return source.name
+        return Path(getattr(source, 'name', None) or 'stream').name
+    
+    def _extract_from_pdf(self, source: Source) -> str:
         """Extract text from PDF file"""
-        text = ""
+        text = "\n".join(self._iter_pdf_pages(source))
+        
+        if not text.strip():
+            logger.warning(f"No text extracted from PDF: {self._source_name(source)}")
+        
+        return text
+    
+    def _iter_pdf_pages(self, source: Source) -> Iterator[str]:
+        """Yield the text of each PDF page (playa if available, else PyPDF2)"""
+        if PLAYA_AVAILABLE:
+            yielded = False
+            try:
+                for page_text in self._iter_pdf_pages_playa(source):
+                    yielded = True
+                    yield page_text
+                return
+            except Exception as e:
+                # Can't fall back once pages have been handed out
+                if yielded:
+                    raise
+                logger.warning(f"playa failed on {self._source_name(source)}, falling back to PyPDF2: {e}")
+                if not isinstance(source, Path):
+                    source.seek(0)
         
+        yield from self._iter_pdf_pages_pypdf2(source)
+    
+    def _iter_pdf_pages_playa(self, source: Source) -> Iterator[str]:
+        """Yield the text of each PDF page using playa-pdf"""
+        doc = playa.open(source) if isinstance(source, Path) else playa.Document(source)
+        with doc:
+            for page_num, page in enumerate(doc.pages):
+                page_text = page.extract_text()
+                logger.debug(f"Extracted text from page {page_num + 1}")
+                if page_text:
+                    yield page_text
+    
+    def _iter_pdf_pages_pypdf2(self, source: Source) -> Iterator[str]:
+        """Yield the text of each PDF page using PyPDF2"""
         try:
-            with open(file_path, 'rb') as file:
+            with (open(source, 'rb') if isinstance(source, Path) else nullcontext(source)) as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 
                 # Check if PDF is encrypted
                 if pdf_reader.is_encrypted:
-                    logger.warning(f"PDF is encrypted: {file_path.name}")
-                    return ""
+                    logger.warning(f"PDF is encrypted: {self._source_name(source)}")
+                    return
                 
-                # Extract text from all pages
                 for page_num, page in enumerate(pdf_reader.pages):
                     try:
                         page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
                         logger.debug(f"Extracted text from page {page_num + 1}")
                     except Exception as e:
                         logger.warning(f"Failed to extract text from page {page_num + 1}: {e}")
                         continue
-                
-                if not text.strip():
-                    logger.warning(f"No text extracted from PDF: {file_path.name}")
+                    
+                    if page_text:
+                        yield page_text
                 
         except Exception as e:
             logger.error(f"PDF extraction error: {e}")
             raise
-        
-        return text
     
-    def _extract_from_docx(self, file_path: Path) -> str:
+    def _extract_from_docx(self, source: Source) -> str:
         """Extract text from DOCX file"""
         text = ""
         
         try:
-            doc = Document(file_path)
+            doc = Document(source)
             
             # Extract text from paragraphs
             for paragraph in doc.paragraphs:
@@ -124,7 +219,7 @@ class DocumentTextExtractor:
                     text += "\n"
             
             if not text.strip():
-                logger.warning(f"No text extracted from DOCX: {file_path.name}")
+                logger.warning(f"No text extracted from DOCX: {self._source_name(source)}")
                 
         except Exception as e:
             logger.error(f"DOCX extraction error: {e}")
@@ -132,23 +227,22 @@ class DocumentTextExtractor:
         
         return text
     
-    def _extract_from_doc(self, file_path: Path) -> str:
+    def _extract_from_doc(self, source: Source) -> str:
         """Extract text from DOC file (older Word format)"""
         raise NotImplementedError(
             "DOC file support not implemented yet. "
             "Please convert to DOCX or PDF format."
         )
     
-    def _extract_from_txt(self, file_path: Path) -> str:
+    def _extract_from_txt(self, source: Source) -> str:
         """Extract text from plain text file"""
+        raw = source.read_bytes() if isinstance(source, Path) else source.read()
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
+            return raw.decode('utf-8')
         except UnicodeDecodeError:
             # Try with different encoding
             try:
-                with open(file_path, 'r', encoding='latin-1') as file:
-                    return file.read()
+                return raw.decode('latin-1')
             except Exception as e:
                 logger.error(f"Text file extraction error: {e}")
                 raise